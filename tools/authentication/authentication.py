@@ -34,6 +34,9 @@ class TouchTopNotchAuth:
         self.refresh_token = None
         self.token_type = "Bearer"  # По умолчанию Bearer
         self.user_info = None
+        # Общая HTTP сессия: keep-alive соединение к сервису авторизации переиспользуется
+        # (refresh, /me, logout) вместо нового TCP+TLS соединения на каждый запрос
+        self._session = requests.Session()
         log.info(f"🔐 TouchTopNotchAuth initialized with API: {self.API_BASE_URL}")
         log.info(f"🔌 WebSocket URL: {self.WEBSOCKET_URL}")
         
@@ -50,7 +53,7 @@ class TouchTopNotchAuth:
         if refresh_token:
             log.info("🔑 Found refresh_token in keyring, attempting auto-login...")
             try:
-                response = requests.post(f"{self.API_BASE_URL}/refresh", params={"refresh_token": refresh_token})
+                response = self._session.post(f"{self.API_BASE_URL}/refresh", params={"refresh_token": refresh_token})
                 if response.status_code == 200:
                     log.info("✅ Auto-login via refresh_token successful!")
                     data = response.json()
@@ -82,7 +85,7 @@ class TouchTopNotchAuth:
         if saved_username and saved_password:
             log.info(f"🔑 Attempting auto-login via username/password: {saved_username}")
             try:
-                response = requests.post(
+                response = self._session.post(
                     f"{self.API_BASE_URL}/token",
                     data={"username": saved_username, "password": saved_password}
                 )
@@ -115,7 +118,7 @@ class TouchTopNotchAuth:
         """Login via username/password"""
         log.info(f"Attempting to login with user: {username}")
         
-        response = requests.post(
+        response = self._session.post(
             f"{self.API_BASE_URL}/token",
             data={"username": username, "password": password}
         )
@@ -160,7 +163,7 @@ class TouchTopNotchAuth:
             "full_name": full_name
         }
         
-        response = requests.post(f"{self.API_BASE_URL}/register", json=data)
+        response = self._session.post(f"{self.API_BASE_URL}/register", json=data)
         
         if response.status_code == 200:
             log.info("✅ Registration successful!")
@@ -175,7 +178,7 @@ class TouchTopNotchAuth:
         log.info("Getting current user information...")
         
         headers = {"Authorization": f"Bearer {token}"}
-        response = requests.get(f"{self.API_BASE_URL}/me", headers=headers)
+        response = self._session.get(f"{self.API_BASE_URL}/me", headers=headers)
         
         if response.status_code == 200:
             log.info("✅ User information retrieved!")
@@ -191,7 +194,7 @@ class TouchTopNotchAuth:
         log.info("Logging out...")
         
         headers = {"Authorization": f"Bearer {token}"}
-        response = requests.post(f"{self.API_BASE_URL}/logout", headers=headers)
+        response = self._session.post(f"{self.API_BASE_URL}/logout", headers=headers)
         
         if response.status_code == 200:
             log.info("✅ Logout successful!")
@@ -420,6 +423,8 @@ class AuthenticatedSession:
         self.on_login_callback = None
         self.on_error_callback = None
         self.has_internet_connection = True
+        # Token model of the current access token; rebuilt only when the token or its type changes
+        self._token: Optional[Token] = None
         log.info("✅ AuthenticatedSession initialized successfully")
         if self.masterAPI:
             self.masterAPI.set_token_refresh_callback(self._refresh_token_sync)
@@ -536,10 +541,7 @@ class AuthenticatedSession:
             result = self.auth_service.auto_login()
             if result and self.auth_service.access_token:
                 log.info("🔁 Token refreshed automatically")
-                return Token(
-                    access_token=self.auth_service.access_token,
-                    token_type=getattr(self.auth_service, "token_type", "Bearer")
-                )
+                return self.token
         except Exception as e:
             log.error(f"❌ Token refresh failed: {e}")
         return None
@@ -640,8 +642,15 @@ class AuthenticatedSession:
             raise AttributeError("No access token available; user is not authenticated")
         # Используем token_type из auth_service, который был получен от сервера
         token_type = getattr(self.auth_service, 'token_type', 'Bearer')
-        # log.info(f"🔑 Creating Token with type: {token_type}")
-        return Token(access_token=self.auth_service.access_token, token_type=token_type)
+        token = self._token
+        # Один Token на access token: его кэши (auth_header, срок действия) переиспользуются между запросами.
+        # Просроченный пересоздается, как раньше при каждом обращении
+        if (token is None or token.access_token != self.auth_service.access_token
+                or token.token_type != token_type or token.is_expired):
+            # log.info(f"🔑 Creating Token with type: {token_type}")
+            token = Token(access_token=self.auth_service.access_token, token_type=token_type)
+            self._token = token
+        return token
 
     def logout(self):
         """Logout the current user."""
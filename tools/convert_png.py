@@ -4,6 +4,39 @@ from PIL import Image
 import sys
 import os
 
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+def is_standard_png(path):
+    """
+    Check from the file header whether a PNG is already in the format convert_png produces:
+    8-bit RGB or RGBA without an embedded ICC profile. Only chunk headers up to IDAT are read.
+    """
+    try:
+        with open(path, "rb") as f:
+            if f.read(8) != PNG_SIGNATURE:
+                return False
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    return False
+                length = int.from_bytes(header[:4], "big")
+                chunk_type = header[4:]
+                if chunk_type == b"IHDR":
+                    ihdr = f.read(length)
+                    bit_depth, color_type = ihdr[8], ihdr[9]
+                    # 2 - RGB, 6 - RGBA
+                    if bit_depth != 8 or color_type not in (2, 6):
+                        return False
+                    f.seek(4, os.SEEK_CUR)  # CRC
+                elif chunk_type == b"iCCP":
+                    return False
+                elif chunk_type == b"IDAT":
+                    return True
+                else:
+                    f.seek(length + 4, os.SEEK_CUR)
+    except (OSError, IndexError):
+        return False
+
 def convert_png(source_path, dest_path=None, keep_alpha=True):
     """
     Convert a PNG file to a standard 8-bit RGB(A) format with no special profiles.
@@ -6,6 +6,14 @@ from pydantic import BaseModel
 from tools.models import Gen3dSaved
 import tools.log as log
 
+# Gallery thumbnails are stored next to the image in a hidden subfolder
+THUMBNAILS_DIR = ".thumbs"
+
+def thumbnail_path(image_path: str) -> str:
+    """Returns the thumbnail location for image_path (the file may not exist); thumbnails are always JPEG."""
+    folder, name = os.path.split(image_path)
+    return os.path.join(folder, THUMBNAILS_DIR, os.path.splitext(name)[0] + ".jpg")
+
 class ProjectContextModel(BaseModel):
     prompt: str
     negative_prompt: str
@@ -52,8 +60,7 @@ def save_source(folder, path, proj_name = None):
     if(project_path is None):
         log.warning("No project path found")
         return
-    if(not os.path.exists(f"{project_path}/{folder}")):
-        os.makedirs(f"{project_path}/{folder}")
+    os.makedirs(f"{project_path}/{folder}", exist_ok=True)
     to = f"{project_path}/{folder}/{path.split('/')[-1]}"
 
     save_arr_item(folder, to, proj_name)
@@ -92,7 +99,15 @@ def save_props(props, proj_name = None):
         json.dump(project_context, f)
 
 def save_arr_item(key, value, proj_name = None):
-    project_path = get_project_path(proj_name)
+    save_arr_items(key, [value], proj_name)
+
+def save_arr_items(key, values, proj_name = None, project_path = None):
+    '''
+    Appends several values to the key array with a single read and write of ProjectContext.json.
+    Values already in the array are skipped.
+    Pass project_path (resolved earlier) when the save may run without an active document.
+    '''
+    project_path = project_path or get_project_path(proj_name)
     if(project_path is None):
         log.warning("No project path found")
         return
@@ -100,10 +115,11 @@ def save_arr_item(key, value, proj_name = None):
         project_context = json.load(f)
         if(key not in project_context):
             project_context[key] = []
-        if isinstance(value, BaseModel):
-            value = value.model_dump()
-        if(value not in project_context[key]):
-            project_context[key].append(value)      
+        for value in values:
+            if isinstance(value, BaseModel):
+                value = value.model_dump()
+            if(value not in project_context[key]):
+                project_context[key].append(value)
     with open(f"{project_path}/ProjectContext.json", "w") as f:
         json.dump(project_context, f)
     
@@ -118,9 +134,12 @@ def remove_arr_item(key, value, proj_name = None):
             return
         if isinstance(value, BaseModel):
             value = value.model_dump()
-        #value - path to file. Delete it
+        #value - path to file. Delete it (and its gallery thumbnail, if any)
         if(os.path.exists(value)):
             os.remove(value)
+            thumb = thumbnail_path(value)
+            if(os.path.exists(thumb)):
+                os.remove(thumb)
             
         if(value in project_context[key]):
             project_context[key].remove(value)  
@@ -149,3 +168,30 @@ def load(project_name=None):
     with open(f"{project_path}/ProjectContext.json", "r") as f:
         context = ProjectContextModel(**json.load(f))
         return context
+
+# ProjectContext.json path -> ((mtime_ns, size), ProjectContextModel)
+_load_cache = {}
+
+def load_cached(project_name=None):
+    '''
+    Same as load(), but reuses the parsed model while ProjectContext.json is unchanged
+    (same mtime and size). The returned model is shared: treat it as read-only.
+    '''
+    project_path = get_project_path(project_name)
+    if(project_path is None):
+        log.warning("No project path found")
+        return
+    context_path = f"{project_path}/ProjectContext.json"
+    try:
+        stat = os.stat(context_path)
+    except FileNotFoundError:
+        stat = None
+    if stat is not None:
+        cached = _load_cache.get(context_path)
+        if cached is not None and cached[0] == (stat.st_mtime_ns, stat.st_size):
+            return cached[1]
+
+    context = load(project_name)
+    stat = os.stat(context_path)
+    _load_cache[context_path] = ((stat.st_mtime_ns, stat.st_size), context)
+    return context
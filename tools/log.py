@@ -168,13 +168,14 @@ def _caller():
     return os.path.splitext(os.path.basename(filename))[0], line, func
 
 
-def _log(level, module_line_func, msg):
+def _log(level, module_line_func, msg, args=()):
     """Internal function to handle logging.
     
     Args:
         level (LogLevel): Log level for this message
         module_line_func (tuple): (module, line, function) information
         msg (str): Message to log
+        args (tuple): Optional %-format arguments, applied only if the message is logged
     
     Returns:
         str: The logged message or None if not logged due to level settings
@@ -182,6 +183,8 @@ def _log(level, module_line_func, msg):
     module, line, func = module_line_func
     
     if getLevel(module) >= level:
+        if args:
+            msg = msg % args
         message = f"{MODULE_NAME}.{module}.{LogLevel.toString(level)}: {msg}"
         
         # Always print to stdout for debugging
@@ -206,51 +209,56 @@ def _log(level, module_line_func, msg):
     return None
 
 
-def debug(msg):
+def debug(msg, *args):
     """Log a debug message.
     
     Args:
         msg (str): Debug message to log
+        *args: Optional %-format arguments for msg (formatted lazily)
     """
     caller_info = _caller()
     _, line, _ = caller_info
     msg = f"({line}) - {msg}"
-    return _log(LogLevel.DEBUG, caller_info, msg)
+    return _log(LogLevel.DEBUG, caller_info, msg, args)
 
 
-def info(msg):
+def info(msg, *args):
     """Log an info message.
     
     Args:
         msg (str): Info message to log
+        *args: Optional %-format arguments for msg (formatted lazily)
     """
-    return _log(LogLevel.INFO, _caller(), msg)
+    return _log(LogLevel.INFO, _caller(), msg, args)
 
 
-def notice(msg):
+def notice(msg, *args):
     """Log a notice message.
     
     Args:
         msg (str): Notice message to log
+        *args: Optional %-format arguments for msg (formatted lazily)
     """
-    return _log(LogLevel.NOTICE, _caller(), msg)
+    return _log(LogLevel.NOTICE, _caller(), msg, args)
 
 
-def warning(msg):
+def warning(msg, *args):
     """Log a warning message.
     
     Args:
         msg (str): Warning message to log
+        *args: Optional %-format arguments for msg (formatted lazily)
     """
-    return _log(LogLevel.WARNING, _caller(), msg)
+    return _log(LogLevel.WARNING, _caller(), msg, args)
 
 
-def error(msg):
+def error(msg, *args):
     """Log an error message.
     
     Args:
         msg (str): Error message to log
+        *args: Optional %-format arguments for msg (formatted lazily)
     """
-    return _log(LogLevel.ERROR, _caller(), msg)
+    return _log(LogLevel.ERROR, _caller(), msg, args)
 
 
@@ -6,15 +6,39 @@ this script is responsible for testing the authentication of the user.
 '''
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+import shutil
+import tempfile
+import zipfile
+import os
 import asyncio
-import inspect
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import time
+from urllib.parse import urlparse
 from tools.models import (Gen2dInput, Gen2dResult, Gen3dInput, Gen3dId, Gen3dResult, Gen3dModel,
                           Token, RemoveBackgroundInput, ClearBackgroundInput, AsyncResponse,
-                          VideoGenInput, VideoGenId, VideoGenStatus, VideoInfo)
-from tools.convert_png import convert_png
+                          VideoGenInput, VideoGenId, VideoGenStatus, VideoInfo, is_zip_url)
+from tools.convert_png import convert_png, is_standard_png
 from PySide.QtCore import QObject, Signal, QRunnable, QThreadPool, Slot
 import tools.log as log
-from typing import Callable, Any, Optional
+from typing import Callable, Any, Optional, Sequence, Tuple
+
+try:
+    import orjson  # быстрый разбор JSON прямо из байтов ответа
+except ImportError:
+    orjson = None
+
+# Расширение файла модели в URL -> поле Gen3dModel
+URL_EXT_TO_MODEL_FIELD = {
+    "zip": "obj_url",
+    "obj": "obj_url",
+    "glb": "glb_url",
+    "fbx": "fbx_url",
+    "usdz": "usdz_url",
+}
 
 class UIStrings:
     """Constant strings used in the UI."""
@@ -29,6 +53,31 @@ class UIStrings:
     )
     CONNECTION_ABORTED_TITLE = "Нет подключения"
 
+    # API errors
+    NO_INTERNET = "Нет подключения к интернету"
+    SERVER_CONNECTION_ERROR = "Ошибка подключения к серверу. Проверьте интернет-соединение."
+    TIMEOUT_ERROR = "Превышено время ожидания запроса ({timeout} сек)"
+
+
+# HTTP статусы временных ошибок сервера: запрос имеет смысл повторить позже
+TRANSIENT_HTTP_STATUSES = frozenset({429, 502, 503, 504})
+
+
+class TransientAPIError(Exception):
+    """Временная ошибка API (таймаут, перегрузка сервера): запрос можно повторить."""
+
+
+# Сообщения о таймауте для таймаутов, используемых методами MasterAPI
+_TIMEOUT_MSGS = {
+    timeout: UIStrings.TIMEOUT_ERROR.format(timeout=timeout) for timeout in (30, 50, 60, 120)
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _is_coroutine_function(fn) -> bool:
+    """Cached coroutine check, keyed by the underlying function of bound methods."""
+    return asyncio.iscoroutinefunction(fn)
+
 
 class AsyncTask(QRunnable):
     """
@@ -41,22 +90,29 @@ class AsyncTask(QRunnable):
         self.args = args
         self.kwargs = kwargs
         self.signals = WorkerSignals()
+        self._is_coro = _is_coroutine_function(getattr(fn, "__func__", fn))
 
     @Slot()
     def run(self):  # executes in thread pool
         try:
             log.info(f"AsyncTask.run: starting function {self.fn.__name__}")
-            if inspect.iscoroutinefunction(self.fn):
-                log.info("AsyncTask.run: detected coroutine, creating new event loop")
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                result = loop.run_until_complete(self.fn(*self.args, **self.kwargs))
-                loop.close()
-                log.info("AsyncTask.run: coroutine completed")
-            else:
-                log.info("AsyncTask.run: calling sync function")
-                result = self.fn(*self.args, **self.kwargs)
-                log.info("AsyncTask.run: sync function completed")
+            try:
+                if self._is_coro:
+                    log.info("AsyncTask.run: detected coroutine, creating new event loop")
+                    loop = asyncio.new_event_loop()
+                    asyncio.set_event_loop(loop)
+                    result = loop.run_until_complete(self.fn(*self.args, **self.kwargs))
+                    loop.close()
+                    log.info("AsyncTask.run: coroutine completed")
+                else:
+                    log.info("AsyncTask.run: calling sync function")
+                    result = self.fn(*self.args, **self.kwargs)
+                    log.info("AsyncTask.run: sync function completed")
+            finally:
+                # The task lives until its result is delivered on the GUI thread;
+                # large arguments (e.g. a base64 payload) are released as soon as fn is done
+                self.args = ()
+                self.kwargs = {}
                 
             log.info(f"AsyncTask.run: result type={type(result).__name__}, is_async_response={isinstance(result, AsyncResponse)}")
             if isinstance(result, AsyncResponse):
@@ -81,14 +137,52 @@ class MasterAPI(QObject):
     APP_NAME = "Archi"
     
     has_internet_connection = False
+    INTERNET_CHECK_TTL_SECONDS = 10
+
+    ENDPOINTS = (
+        "/tools/v1/2d_generator",
+        "/tools/v1/3d_generator",
+        "/tools/v1/remove-background",
+        "/tools/v1/remove-background-pipeline",
+        "/tools/v1/clear-background",
+        "/tools/v1/video_generator",
+        "/tools/v1/get-video",
+        "/tools/v1/get-object",
+        "/health",
+    )
     
     def __init__(self, api_base_url: str = None):
         super().__init__()
         if api_base_url:
             self.API_BASE_URL = api_base_url
+        # Полные URL эндпоинтов считаются один раз, API_BASE_URL не меняется после создания
+        self._urls = {endpoint: self.API_BASE_URL + endpoint for endpoint in self.ENDPOINTS}
+        # Общая HTTP сессия: keep-alive соединения переиспользуются всеми запросами
+        # (генерация, опрос статуса, скачивание файлов) вместо нового TCP соединения на каждый вызов
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=32,
+            # Повторяется только установка соединения. read=False: таймаут чтения сразу
+            # поднимается как ReadTimeout (ветка Timeout -> TransientAPIError), а не после
+            # трех повторов в виде ConnectionError (read=0 тоже дает ConnectionError для GET)
+            max_retries=Retry(total=3, connect=3, read=False, backoff_factor=0.2)
+        )
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        # Ограниченный пул для сетевых загрузок файлов
+        self._io_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="archi-dl-io")
+        # Размеры файлов по URL (Content-Length), чтобы не скачивать уже сохраненные файлы
+        self._head_sizes: dict[str, Optional[int]] = {}
+        # Отдельный пул для конвертации изображений, чтобы CPU работа не занимала потоки загрузок
+        self._cpu_pool = ThreadPoolExecutor(
+            max_workers=(os.cpu_count() or 2) // 2 or 1,
+            thread_name_prefix="archi-cpu"
+        )
         self.thread_pool = QThreadPool.globalInstance()
-        # Keep strong references to active tasks to prevent GC before slots run
-        self._active_tasks = set()
+        # Проверка подключения разделяется между параллельными запросами (см. _check_internet_connection)
+        self._internet_check_lock = threading.Lock()
+        self._internet_checked_at = float("-inf")
         # No extra main-thread relay; Qt will marshal signal deliveries appropriately
         self._token_refresh_callback: Optional[Callable[[], Optional[Token]]] = None
 
@@ -99,18 +193,8 @@ class MasterAPI(QObject):
     
     def _create_auth_headers(self, token: Token) -> dict:
         """Создает заголовки авторизации для HTTP запросов."""
-        # Нормализуем token_type: приводим к правильному формату
-        token_type = token.token_type.strip() if token.token_type else "Bearer"
-        # Убеждаемся, что первая буква заглавная, остальные строчные
-        if token_type:
-            token_type = token_type.capitalize()
-        else:
-            token_type = "Bearer"
-        
-        auth_header = f"{token_type} {token.access_token}"
-        log.debug(f"_create_auth_headers: token_type='{token.token_type}' -> normalized='{token_type}'")
-        log.debug(f"_create_auth_headers: header='{token_type} {token.access_token[:20]}...'")
-        return {"Authorization": auth_header}
+        # Заголовок (с нормализованным token_type) кэшируется в самом токене
+        return {"Authorization": token.auth_header}
     
     def _log_request_details(self, method_name: str, endpoint: str, payload: dict, token: Token):
         """Логирует детали HTTP запроса."""
@@ -145,9 +229,9 @@ class MasterAPI(QObject):
     def _handle_api_response(self, method_name: str, response: requests.Response, expected_keys: list = None) -> dict:
         """Обрабатывает ответ API и возвращает данные JSON."""
         try:
-            data = response.json()
+            data = orjson.loads(response.content) if orjson else response.json()
         except Exception as e:
-            log.error(f"{method_name}: failed to parse JSON, text starts: {response.text[:200]}")
+            log.error(f"{method_name}: failed to parse JSON, text starts: {response.content[:200]!r}")
             raise Exception(response.text)
         
         # Проверяем наличие ожидаемых ключей
@@ -161,19 +245,29 @@ class MasterAPI(QObject):
         return data
     
     def _check_internet_connection(self) -> bool:
-        """Проверяет подключение к интернету."""
-        try:
-            response = requests.get("http://www.google.com", timeout=5)
-            self.has_internet_connection = response.status_code == 200
+        """
+        Проверяет подключение к интернету.
+        
+        Параллельные запросы (например, опрос статуса нескольких 3D генераций)
+        ждут одну общую проверку, и ее результат переиспользуется
+        в течение INTERNET_CHECK_TTL_SECONDS.
+        """
+        with self._internet_check_lock:
+            now = time.monotonic()
+            if now - self._internet_checked_at < self.INTERNET_CHECK_TTL_SECONDS:
+                return self.has_internet_connection
+            try:
+                response = requests.get("http://www.google.com", timeout=5)
+                self.has_internet_connection = response.status_code == 200
+            except Exception:
+                self.has_internet_connection = False
+            self._internet_checked_at = now
             return self.has_internet_connection
-        except Exception:
-            self.has_internet_connection = False
-            return False
     
     def check_api_health(self) -> bool:
         """Проверяет состояние API сервера."""
         try:
-            response = requests.get(f"{self.API_BASE_URL}/health", timeout=10)
+            response = self._session.get(self._urls["/health"], timeout=10)
             return response.status_code == 200
         except Exception as e:
             log.error(f"API health check failed: {e}")
@@ -189,9 +283,9 @@ class MasterAPI(QObject):
         """Универсальный метод для выполнения API запросов."""
         # Проверяем подключение к интернету
         if not self._check_internet_connection():
-            raise Exception("Нет подключения к интернету")
+            raise Exception(UIStrings.NO_INTERNET)
         
-        url = f"{self.API_BASE_URL}{endpoint}"
+        url = self._urls.get(endpoint) or (self.API_BASE_URL + endpoint)
         headers = self._create_auth_headers(token)
         
         # # Детальное логирование заголовков авторизации для отладки
@@ -208,9 +302,9 @@ class MasterAPI(QObject):
         try:
             # Выполняем запрос
             if method.upper() == "GET":
-                response = requests.get(url, params=params, headers=headers, timeout=timeout)
+                response = self._session.get(url, params=params, headers=headers, timeout=timeout)
             elif method.upper() == "POST":
-                response = requests.post(url, json=payload, headers=headers, timeout=timeout)
+                response = self._session.post(url, json=payload, headers=headers, timeout=timeout)
             else:
                 raise ValueError(f"Unsupported HTTP method: {method}")
             
@@ -224,13 +318,13 @@ class MasterAPI(QObject):
             return self._handle_api_response(method, response, expected_keys)
             
         except requests.exceptions.ConnectionError as e:
-            error_msg = "Ошибка подключения к серверу. Проверьте интернет-соединение."
+            error_msg = UIStrings.SERVER_CONNECTION_ERROR
             log.error(f"{method}: Connection error: {error_msg}")
             raise Exception(error_msg)
         except requests.exceptions.Timeout as e:
-            error_msg = f"Превышено время ожидания запроса ({timeout} сек)"
+            error_msg = _TIMEOUT_MSGS.get(timeout) or UIStrings.TIMEOUT_ERROR.format(timeout=timeout)
             log.error(f"{method}: Timeout error: {error_msg}")
-            raise Exception(error_msg)
+            raise TransientAPIError(error_msg)
         except requests.exceptions.HTTPError as e:
             # Детальное логирование для ошибок авторизации
             status_code = response.status_code if 'response' in locals() else 'unknown'
@@ -255,6 +349,8 @@ class MasterAPI(QObject):
                 log.error(f"{method}: HTTP {status_code}: {response_text[:500]}")
             
             error_msg = f"HTTP {status_code}: {response_text[:200]}"
+            if status_code in TRANSIENT_HTTP_STATUSES:
+                raise TransientAPIError(error_msg)
             raise Exception(error_msg)
         except Exception as e:
             error_msg = f"Неожиданная ошибка в {method}: {str(e)}"
@@ -277,12 +373,11 @@ class MasterAPI(QObject):
             task.signals.setParent(self)
         except Exception:
             pass
-        # Retain the task strongly until finished
-        self._active_tasks.add(task)
+        # The connected closure is the strong reference that keeps the task alive
+        # until its result is delivered; disconnecting it releases the task
         def _on_finished(result, error):
-            # Release retained task
             try:
-                self._active_tasks.discard(task)
+                task.signals.finished.disconnect(_on_finished)
             except Exception:
                 pass
             try:
@@ -426,7 +521,7 @@ class MasterAPI(QObject):
             raise Exception(f"Unexpected response format: {response_data}")
     async def remove_background_pipeline(self, token: Token, removeBackgroundInput: RemoveBackgroundInput):
         """Удаляет фон с изображения используя pipeline."""
-        payload = removeBackgroundInput.model_dump()
+        payload = removeBackgroundInput.model_dump(exclude_none=True)
         
         # Выполняем API запрос в отдельном потоке, чтобы не блокировать event loop
         loop = asyncio.get_event_loop()
@@ -445,9 +540,8 @@ class MasterAPI(QObject):
         
     async def remove_background(self, token: Token, removeBackgroundInput: RemoveBackgroundInput):
         """Удаляет фон с изображения."""
-        payload = removeBackgroundInput.model_dump()
         # Удаляем None поля явно
-        payload = {k: v for k, v in payload.items() if v is not None}
+        payload = removeBackgroundInput.model_dump(exclude_none=True)
         
         # Выполняем API запрос в отдельном потоке, чтобы не блокировать event loop
         loop = asyncio.get_event_loop()
@@ -466,8 +560,7 @@ class MasterAPI(QObject):
         
     async def clear_background(self, token: Token, clearBackgroundInput: ClearBackgroundInput):
         """Очищает фон изображения."""
-        payload = clearBackgroundInput.model_dump()
-        payload = {k: v for k, v in payload.items() if v is not None}
+        payload = clearBackgroundInput.model_dump(exclude_none=True)
         
         # Выполняем API запрос в отдельном потоке, чтобы не блокировать event loop
         loop = asyncio.get_event_loop()
@@ -644,35 +737,17 @@ class MasterAPI(QObject):
                     # Новый формат API: url в корне ответа (Obj3dResult model)
                     # API возвращает только один URL модели - используем его напрямую
                     # Определяем формат по расширению URL и заполняем только соответствующий формат
-                    # Убираем query параметры для проверки расширения
-                    url_without_query = url.split('?')[0] if '?' in url else url
-                    url_lower = url_without_query.lower()
-                    model = Gen3dModel(
-                        glb_url="",
-                        fbx_url="",
-                        usdz_url="",
-                        obj_url=""
-                    )
-                    
-                    # Заполняем только тот формат, который реально есть в URL
-                    if url_lower.endswith(".zip"):
-                        # ZIP архив содержит OBJ файлы (material_0.png, material.mtl, model.obj)
-                        model.obj_url = url
-                    elif url_lower.endswith(".glb"):
-                        model.glb_url = url
-                    elif url_lower.endswith(".fbx"):
-                        model.fbx_url = url
-                    elif url_lower.endswith(".usdz"):
-                        model.usdz_url = url
-                    elif url_lower.endswith(".obj"):
-                        model.obj_url = url
-                    else:
-                        # Если формат не определен, проверяем наличие .zip в URL (может быть в query)
-                        if ".zip" in url_lower:
-                            model.obj_url = url
-                        else:
-                            # Если формат не определен, используем как GLB по умолчанию
-                            model.glb_url = url
+                    # Расширение берется из пути URL (без query параметров)
+                    ext = urlparse(url).path.rsplit(".", 1)[-1].lower()
+                    # ZIP архив содержит OBJ файлы (material_0.png, material.mtl, model.obj)
+                    field = URL_EXT_TO_MODEL_FIELD.get(ext)
+                    if field is None:
+                        # Формат не определен по пути: .zip может быть в другом месте URL
+                        # (например download?file=model.zip), иначе используем GLB по умолчанию
+                        field = "obj_url" if is_zip_url(url) else "glb_url"
+                    fields = {"glb_url": "", "fbx_url": "", "usdz_url": "", "obj_url": ""}
+                    fields[field] = url
+                    model = Gen3dModel(**fields)
                     
                     return Gen3dResult(
                         progress=100,
@@ -698,34 +773,167 @@ class MasterAPI(QObject):
             # Legacy формат (для обратной совместимости)
             return Gen3dResult(**data)
     
+    DOWNLOAD_WRITE_BUFFER = 1 << 20
+
     async def download_file(self, url: str, path: str):
         loop = asyncio.get_event_loop()
 
         def _sync_download():
-            response = requests.get(url)
-            if response.status_code != 200:
-                raise Exception(f"Failed to download file: {response.status_code}")
-            try:
+            with self._session.get(url, stream=True, timeout=(5, 30)) as response:
+                if response.status_code != 200:
+                    raise Exception(f"Failed to download file: {response.status_code}")
                 log.info("Saving file to " + str(path))
-                with open(path, "wb") as f:
-                    f.write(response.content)
-                if(path.split('.')[-1] == 'png'):
-                    log.info("Converting to PNG")
-                    convert_png(path, path)
-                else:
-                    log.info("Path " + str(path) + " is not a PNG")
+                # Stream the body to disk in 64 KiB chunks instead of buffering the whole payload;
+                # the file appears under its final name only once it is complete
+                partial_path = path + ".part"
+                try:
+                    downloaded = 0
+                    # 1 MiB write buffer: 64 KiB network chunks are coalesced into fewer write syscalls
+                    with open(partial_path, "wb", buffering=self.DOWNLOAD_WRITE_BUFFER) as f:
+                        for chunk in response.iter_content(chunk_size=1 << 16):
+                            if chunk:
+                                f.write(chunk)
+                                downloaded += len(chunk)
+                    os.replace(partial_path, path)
+                    return downloaded
+                except Exception as e:
+                    # Do not leave a half written file next to the real one
+                    try:
+                        os.remove(partial_path)
+                    except OSError:
+                        pass
+                    raise Exception(f"Failed to save file: {e}")
+
+        # Offload sync request to the download thread pool
+        downloaded = await loop.run_in_executor(self._io_pool, _sync_download)
+        # A stale size record from an earlier download must not outlive the new file
+        self._write_download_size(path, None)
+
+        # Conversion is CPU work, it is offloaded separately from the network/disk step
+        if os.path.splitext(path)[1].lower() == '.png':
+            if is_standard_png(path):
+                log.info("Path " + str(path) + " is already a standard PNG, skipping conversion")
+                return True
+            log.info("Converting to PNG")
+            try:
+                await loop.run_in_executor(self._cpu_pool, convert_png, path, path)
             except Exception as e:
                 raise Exception(f"Failed to save file: {e}")
+            # The converted file no longer has the server's size; remember the downloaded one
+            self._write_download_size(path, downloaded)
+        else:
+            log.info("Path " + str(path) + " is not a PNG")
 
-        # Offload sync request to a thread
-        await loop.run_in_executor(None, _sync_download)
+        return True
+
+    async def download_zip_extract(self, url: str, folder: str, rename_map: dict):
+        """
+        Downloads a ZIP archive and extracts the needed members without
+        persisting the archive itself.
+        
+        Args:
+            url: URL of the ZIP archive
+            folder: Destination folder
+            rename_map: Lower-cased member name -> destination file name;
+                members not in the map are skipped
+        """
+        loop = asyncio.get_event_loop()
+
+        def _sync_download_extract():
+            with self._session.get(url, stream=True, timeout=30) as response:
+                if response.status_code != 200:
+                    raise Exception(f"Failed to download file: {response.status_code}")
+                response.raw.decode_content = True
+                # Archive is kept in memory, spilling to a temp file only if it is large
+                with tempfile.SpooledTemporaryFile(max_size=64 << 20) as spool:
+                    shutil.copyfileobj(response.raw, spool, length=1 << 16)
+                    spool.seek(0)
+                    with zipfile.ZipFile(spool) as zip_ref:
+                        for member in zip_ref.infolist():
+                            target = rename_map.get(member.filename.lower())
+                            if not target:
+                                continue
+                            target_path = os.path.join(folder, target)
+                            partial_path = target_path + ".part"
+                            log.info(f"Extracting {member.filename} to {target_path}")
+                            # Members are inflated straight into the target file, 1 MiB at a time
+                            with zip_ref.open(member) as src, open(partial_path, "wb") as dst:
+                                shutil.copyfileobj(src, dst, length=self.DOWNLOAD_WRITE_BUFFER)
+                            # Atomic rename: readers never see a partially extracted file
+                            os.replace(partial_path, target_path)
+
+        await loop.run_in_executor(self._io_pool, _sync_download_extract)
 
         return True
 
-    async def download_files(self, from_to_source: map):
-        # Each file is downloaded in sequence
-        for from_url, to_path in from_to_source:
-            await self.download_file(from_url, to_path)
+    async def _head_size(self, url: str) -> Optional[int]:
+        """Returns the Content-Length of url (cached per url), or None if unknown."""
+        if url in self._head_sizes:
+            return self._head_sizes[url]
+        loop = asyncio.get_event_loop()
+
+        def _sync_head():
+            try:
+                response = self._session.head(url, allow_redirects=True, timeout=(5, 10))
+            except Exception as e:
+                log.warning(f"HEAD {url} failed: {e}")
+                return None
+            content_length = response.headers.get("Content-Length", "")
+            if response.status_code != 200 or not content_length.isdigit():
+                return None
+            return int(content_length)
+
+        size = await loop.run_in_executor(self._io_pool, _sync_head)
+        self._head_sizes[url] = size
+        return size
+
+    # Sidecar with the downloaded size of a file that was rewritten after download (PNG conversion)
+    DOWNLOAD_SIZE_SUFFIX = ".dlsize"
+
+    def _write_download_size(self, path: str, size: Optional[int]) -> None:
+        """Records (or with size=None removes) the downloaded size of path."""
+        sidecar = path + self.DOWNLOAD_SIZE_SUFFIX
+        try:
+            if size is None:
+                if os.path.exists(sidecar):
+                    os.remove(sidecar)
+            else:
+                with open(sidecar, "w") as f:
+                    f.write(str(size))
+        except OSError as e:
+            log.warning(f"Failed to update {sidecar}: {e}")
+
+    def _downloaded_size(self, path: str) -> int:
+        """Size of path as it was downloaded: the recorded one if the file was converted, else the file size."""
+        try:
+            with open(path + self.DOWNLOAD_SIZE_SUFFIX) as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return os.path.getsize(path)
+
+    async def _should_download(self, url: str, path: str) -> bool:
+        """A file is skipped when it exists and its downloaded size matches the server's (if known)."""
+        if not os.path.exists(path):
+            return True
+        size = await self._head_size(url)
+        return size is not None and self._downloaded_size(path) != size
+
+    MAX_PARALLEL_DOWNLOADS = 8
+
+    async def download_files(self, from_to_source: Sequence[Tuple[str, str]]) -> None:
+        """Downloads (url, path) pairs; files are independent, so they are downloaded concurrently."""
+        if not from_to_source:
+            return
+        semaphore = asyncio.Semaphore(self.MAX_PARALLEL_DOWNLOADS)
+
+        async def _download_one(from_url: str, to_path: str):
+            async with semaphore:
+                if not await self._should_download(from_url, to_path):
+                    log.info(f"Skipping download, file already exists: {to_path}")
+                    return
+                await self.download_file(from_url, to_path)
+
+        await asyncio.gather(*[_download_one(from_url, to_path) for from_url, to_path in from_to_source])
    
 
     def run_async_task(
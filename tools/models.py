@@ -1,7 +1,10 @@
+import re
+from urllib.parse import urlparse
 from typing import Optional, Any, Generic, TypeVar
-from pydantic import BaseModel, field_validator, computed_field, Field
+from pydantic import BaseModel, field_validator, computed_field, Field, PrivateAttr, AliasChoices, ConfigDict
 from typing import List, Tuple
 from datetime import datetime, timedelta
+from dataclasses import dataclass
 
 T = TypeVar('T', bound=Any)
 
@@ -19,10 +22,18 @@ class Token(BaseModel):
     token_type: str = "Bearer"
     delta_minutes: int = 15
     last_update: datetime = Field(default_factory=datetime.now)
+    # Deadline is computed once per token update instead of on every is_expired access
+    _expires_at: datetime = PrivateAttr(default=datetime.max)
+    # Formatted Authorization header and the (token_type, access_token) it was built from
+    _auth_header: Optional[str] = PrivateAttr(default=None)
+    _auth_header_key: Optional[Tuple[str, str]] = PrivateAttr(default=None)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._expires_at = self.last_update + timedelta(minutes=self.delta_minutes)
 
     @computed_field
     def is_expired(self) -> bool:
-        return datetime.now() - self.last_update > timedelta(minutes=self.delta_minutes)
+        return datetime.now() > self._expires_at
 
     @field_validator('access_token')
     @classmethod
@@ -35,6 +46,18 @@ class Token(BaseModel):
         if new_token != self.access_token:
             self.access_token = new_token
             self.last_update = datetime.now()
+            self._expires_at = self.last_update + timedelta(minutes=self.delta_minutes)
+
+    @property
+    def auth_header(self) -> str:
+        """Authorization header value, formatted once per token change."""
+        key = (self.token_type, self.access_token)
+        if self._auth_header_key != key:
+            # Normalize token_type: "bearer" -> "Bearer"
+            token_type = (self.token_type or "").strip().capitalize() or "Bearer"
+            self._auth_header = f"{token_type} {self.access_token}"
+            self._auth_header_key = key
+        return self._auth_header
 
     def get_token(self) -> str:
         if self.is_expired:
@@ -47,8 +70,9 @@ class Token(BaseModel):
             "token_type": self.token_type
         }
 
-class AsyncResponse(BaseModel, Generic[T]):
-    model_config = { 'arbitrary_types_allowed': True }
+@dataclass(slots=True)
+class AsyncResponse(Generic[T]):
+    """Internal result/error carrier for background tasks; never serialized, so no validation."""
     result: Optional[T] = None
     error: Optional[Exception] = None
 
@@ -106,11 +130,33 @@ class Gen3dModel(BaseModel):
     usdz_url: Optional[str] = ""
     obj_url: Optional[str] = ""
 
+# Gen3dModel fields in preference order, with the file extension of each format
+GEN3D_FORMAT_PRIORITY = (
+    ("obj_url", ".obj"),
+    ("glb_url", ".glb"),
+    ("fbx_url", ".fbx"),
+    ("usdz_url", ".usdz"),
+)
+
+# ".zip" where a file name can end in the path and query of a model URL: end of the path,
+# inside the query (download?file=model.zip&...) or before a further path segment
+ZIP_URL_RE = re.compile(r'\.zip(?:$|[?&/])', re.IGNORECASE)
+
+def is_zip_url(url: str) -> bool:
+    """Whether a model URL points to a ZIP archive; the host is not checked (cdn.example.zip/m.glb is not a ZIP)."""
+    if not url:
+        return False
+    parsed = urlparse(url)
+    target = f"{parsed.path}?{parsed.query}" if parsed.query else parsed.path
+    return ZIP_URL_RE.search(target) is not None
+
 class Gen3dTexture(BaseModel):
-    base_color_url: str
-    metallic_url: str
-    roughness_url: str
-    normal_url: str
+    # Accepts both the old (*_url) and the new API (*_texture) field names
+    model_config = ConfigDict(populate_by_name=True)
+    base_color_url: str = Field(validation_alias=AliasChoices("base_color_url", "base_color_texture"))
+    metallic_url: str = Field(validation_alias=AliasChoices("metallic_url", "metallic_texture"))
+    roughness_url: str = Field(validation_alias=AliasChoices("roughness_url", "roughness_texture"))
+    normal_url: str = Field(validation_alias=AliasChoices("normal_url", "normal_texture"))
 
 class Gen3dResult(BaseModel):
     progress: int
@@ -1,9 +1,9 @@
-import FreeCADGui
 from PySide.QtWidgets import QDockWidget, QFormLayout, QWidget
 from PySide.QtCore import Qt
 from typing import Optional
 import FreeCAD # Import for PrintMessage
 from tools import log
+from tools.project_context.utils.widgets import main_window
 class FormWindow(QDockWidget):
     """
     Base class for dockable windows with a QFormLayout,
@@ -25,8 +25,6 @@ class FormWindow(QDockWidget):
             FreeCAD.Console.PrintError(f"FormWindow.__init__: Error in super().__init__: {e}\n")
             raise
 
-        self.setWindowTitle(title)
-        
         self.central_widget = QWidget()
         self.formLayout = QFormLayout()
         self.central_widget.setLayout(self.formLayout)
@@ -44,7 +42,7 @@ class FormWindow(QDockWidget):
         """Calculates the window size and position and applies it."""
         # This method is currently not called from the simplified __init__
         try:
-            main_win = FreeCADGui.getMainWindow()
+            main_win = main_window()
             if not main_win:
                 self.resize(600, 500)
                 log.info("FormWindow._calculate_and_set_geometry: Resized to default 600x500")
@@ -8,27 +8,39 @@ This module handles the complete 2D generation pipeline:
 - Saves generated images to disk
 - Updates gallery with results
 """
-import base64
-import datetime
+import functools
+import hashlib
 import os
-from typing import Optional, List
+import traceback
+import weakref
+from collections import deque
+from typing import Optional, Tuple, Dict, Deque, List
 
-import FreeCAD
-import FreeCADGui
-from PySide.QtCore import Qt, QObject
+from PySide.QtCore import Qt, QObject, QTimer, QByteArray, QFile, QIODevice, QCoreApplication
+from PySide.QtGui import QImage, QPixmap
 from PySide.QtWidgets import QMessageBox, QWidget
+try:
+    from PySide import shiboken
+except ImportError:
+    try:
+        import shiboken6 as shiboken
+    except ImportError:
+        shiboken = None
 
 from tools.authentication import AuthenticatedSession
-from tools.master_api import MasterAPI
+from tools.master_api import MasterAPI, TransientAPIError
 from tools import models as Models
 from tools import exporting
 from tools.models import AsyncResponse
-from tools.project_context.utils.gallery_utils import GalleryWidget, ImageCell, LoadingCell
+from tools.project_context.utils.gallery_utils import (
+    GalleryWidget, ImageCell, LoadingCell, thumbnail_path, write_thumbnail
+)
 from tools.full_view import (
     FullViewWindow, FullViewWindowData, 
     FullViewImageInteractable, FullViewButtonData
 )
 from tools.project_context.utils.project_behaviour_base import ProjectBehaviour
+from tools.project_context.utils.widgets import main_window
 from tools.project_context.pipelines.gen_2d.prepare import PrepareFor2dGen
 import tools.log as log
 
@@ -55,6 +67,7 @@ class UIStrings:
 class PromptEnhancements:
     """Additional prompts for better generation quality."""
     
+    # Stripped once at import; appended to the user prompt on every generation
     POSITIVE = """
     Single isolated futuristic tower in the center of the frame.
 The same unique sculptural building on all views.
@@ -76,7 +89,7 @@ no cars, no people, no street furniture, no text, no logos.
 Focus only on the geometry of this single tower.
 High clarity, sharp edges, perfect symmetry where visible.
 Suitable as reference for 3D reconstruction.
-    """
+    """.strip()
     
     NEGATIVE = """
     generic modern office tower, typical 2010s skyscraper, 
@@ -85,7 +98,7 @@ dense city background, skyline, other high-rises,
 trees, grass, park, cars, buses, people, crowd, street lights, benches,
 billboards, text, logos, advertisements,
 complex shadows, dramatic lighting, fog, haze, film grain, dirt, damage
-    """
+    """.strip()
 
 
 class Generate2dBehaviour(ProjectBehaviour):
@@ -102,6 +115,21 @@ class Generate2dBehaviour(ProjectBehaviour):
     
     ESTIMATED_GENERATION_TIME_SECONDS: int = 25
     GENERATIONS_DIR = "generations2d"
+    # Requests sent to the API at once; further generations wait in a queue
+    MAX_CONCURRENT_GENERATIONS = 5
+    # Retries of transient API failures (timeouts, 429/5xx); delay doubles from RETRY_BASE_DELAY_MS
+    MAX_RETRIES = 3
+    RETRY_BASE_DELAY_MS = 1000
+    # Base64 characters decoded per slice; a multiple of 4 so slices decode independently
+    B64_DECODE_CHUNK = 64 * 1024
+    # Leading bytes of the image formats the API may return -> file extension (JPEG otherwise)
+    IMAGE_SIGNATURES = (
+        (b"\xff\xd8\xff", ".jpg"),
+        (b"\x89PNG", ".png"),
+        (b"RIFF", ".webp"),
+    )
+    # New generations are added to ProjectContext.json in one write after this quiet period
+    SAVE_FLUSH_DELAY_MS = 1000
     
     def __init__(
         self,
@@ -136,8 +164,30 @@ class Generate2dBehaviour(ProjectBehaviour):
         self.prompt_edit = prompt_edit
         self.full_view = full_view
         
-        # Stack for tracking loading cells
-        self.gen_stack: List[int] = []
+        # Loading cells of unfinished generations, keyed by the id returned from add_cell
+        self._inflight: Dict[int, LoadingCell] = {}
+        # Generations waiting for a free request slot: (cell_id, enhanced input)
+        self._pending: Deque[Tuple[int, Models.Gen2dInput]] = deque()
+        self._running = 0
+        # Enhanced input and failed attempts of each generation, kept for retries
+        self._requests: Dict[int, Models.Gen2dInput] = {}
+        self._attempts: Dict[int, int] = {}
+        
+        # Generations folder already known to exist (skips makedirs on later saves)
+        self._gen_dir: Optional[str] = None
+        
+        # Saved images not yet recorded in ProjectContext.json: project folder -> paths.
+        # The folder is resolved when the image is saved, a flush may run without an active document
+        self._pending_saves: Dict[str, List[str]] = {}
+        self._save_timer = QTimer()
+        self._save_timer.setSingleShot(True)
+        self._save_timer.setInterval(self.SAVE_FLUSH_DELAY_MS)
+        self._save_timer.timeout.connect(self._flush_saves)
+        # Pending saves must not wait for the timer when the gallery or the application goes away
+        self.gen2d.destroyed.connect(self._flush_saves)
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self._flush_saves)
         
         # Dialog reference
         self.selectBestSketch: Optional[PrepareFor2dGen] = None
@@ -149,7 +199,7 @@ class Generate2dBehaviour(ProjectBehaviour):
     
     def _show_sketch_selector(self):
         """Create and display the sketch selection dialog."""
-        if not self.sketches or not self.sketches.cells:
+        if self.sketches is None or len(self.sketches) == 0:
             QMessageBox.warning(None, UIStrings.NO_SKETCHES_TITLE, UIStrings.NO_SKETCHES_TEXT)
             self.deleteLater()
             return
@@ -160,33 +210,25 @@ class Generate2dBehaviour(ProjectBehaviour):
                 onApprove=self.generate_render
             )
         except Exception as e:
-            FreeCAD.Console.PrintError(
-                f"Gen2dBehaviour._show_sketch_selector: CRITICAL ERROR: {e}\n"
-            )
-            import traceback
-            FreeCAD.Console.PrintError(traceback.format_exc() + "\n")
+            log.error("Gen2dBehaviour._show_sketch_selector: CRITICAL ERROR: %s\n%s", e, traceback.format_exc())
             QMessageBox.critical(None, UIStrings.INIT_ERROR_TITLE, f"Не удалось создать окно подготовки: {e}")
             self.deleteLater()
             return
 
         try:
-            main_window = FreeCADGui.getMainWindow()
-            if not main_window:
-                FreeCAD.Console.PrintError(
-                    "Gen2dBehaviour._show_sketch_selector: Failed to get main window!\n"
-                )
+            dock_parent = main_window()
+            if not dock_parent:
+                log.error("Gen2dBehaviour._show_sketch_selector: Failed to get main window!")
                 self.selectBestSketch.deleteLater()
                 self.deleteLater()
                 return
 
-            main_window.addDockWidget(Qt.LeftDockWidgetArea, self.selectBestSketch)
+            dock_parent.addDockWidget(Qt.LeftDockWidgetArea, self.selectBestSketch)
             self.selectBestSketch.setFloating(True)
             self.selectBestSketch.show()
         
         except Exception as e:
-            FreeCAD.Console.PrintError(f"Gen2dBehaviour._show_sketch_selector: Error: {e}\n")
-            import traceback
-            FreeCAD.Console.PrintError(traceback.format_exc() + "\n")
+            log.error("Gen2dBehaviour._show_sketch_selector: Error: %s\n%s", e, traceback.format_exc())
             QMessageBox.critical(None, UIStrings.DISPLAY_ERROR_TITLE, f"Не удалось отобразить окно подготовки: {e}")
             if self.selectBestSketch:
                 self.selectBestSketch.deleteLater()
@@ -202,13 +244,24 @@ class Generate2dBehaviour(ProjectBehaviour):
         cell = LoadingCell()
         cell.set_estimated_time(self.ESTIMATED_GENERATION_TIME_SECONDS)
         cell_id = self.gen2d.add_cell(cell)
-        self.gen_stack.append(cell_id)
+        self._inflight[cell_id] = cell
         return cell_id
     
-    def _remove_loading_animation(self):
-        """Remove the loading animation from the gallery."""
-        if self.gen_stack:
-            self.gen2d.remove(self.gen_stack.pop())
+    def _loading_cell_index(self, cell_id: int) -> Optional[int]:
+        """
+        Current gallery index of a loading cell.
+        
+        Gallery indices shift when earlier cells are removed, so the cell is looked up by identity.
+        """
+        cell = self._inflight.get(cell_id)
+        return next((i for i, c in enumerate(self.gen2d.cells) if c is cell), None)
+    
+    def _remove_loading_animation(self, cell_id: int):
+        """Remove the loading animation of a generation from the gallery."""
+        index = self._loading_cell_index(cell_id)
+        self._inflight.pop(cell_id, None)
+        if index is not None:
+            self.gen2d.remove(index)
     
     def _show_error_message(self, message: str):
         """
@@ -218,7 +271,7 @@ class Generate2dBehaviour(ProjectBehaviour):
             message: The error message to display
         """
         QMessageBox.warning(
-            FreeCADGui.getMainWindow(), 
+            main_window(), 
             UIStrings.ERROR_TITLE, 
             message, 
             QMessageBox.Ok
@@ -233,59 +286,84 @@ class Generate2dBehaviour(ProjectBehaviour):
         Args:
             gen2dInput: Input parameters for the 2D generation
         """
-        # Save input parameters
-        self._save_parameters(gen2dInput)
-
-        # Show loading animation
-        cell_id = self._show_loading_animation()
-        
-        # Check authentication
-        if self.authSession.is_authenticated():
-            token = self.authSession.token
-        else:
-            log.info("Gen2dBehaviour.generate_render: Starting auto login")
-            
-            def on_auto_login(response: AsyncResponse):
-                if response.has_result():
-                    self.generate_render(gen2dInput)
-                else:
-                    QMessageBox.critical(None, UIStrings.AUTH_ERROR_TITLE, UIStrings.AUTH_ERROR_TEXT)
-                    
-            self.authSession.auto_login(on_auto_login)
-            return
+        # Parameters are already saved by PrepareFor2dGen; only mirror the prompt in the project window
+        self._sync_prompt_edit(gen2dInput)
         
-        # Prepare enhanced input with additional prompts
+        # Prepare enhanced input with additional prompts (once, also reused after auto login)
         enhanced_input = Models.Gen2dInput(
-            prompt=gen2dInput.prompt + PromptEnhancements.POSITIVE,
-            negative_prompt=gen2dInput.negative_prompt + PromptEnhancements.NEGATIVE,
+            prompt=f"{gen2dInput.prompt}\n{PromptEnhancements.POSITIVE}",
+            negative_prompt=f"{gen2dInput.negative_prompt}\n{PromptEnhancements.NEGATIVE}",
             control_strength=gen2dInput.control_strength,
             image_base64=gen2dInput.image_base64,
             seed=gen2dInput.seed
         )
+        self._submit_generation(enhanced_input)
+    
+    def _submit_generation(self, enhanced_input: Models.Gen2dInput):
+        """
+        Queue an enhanced generation request, logging in first if needed.
         
-        # Define callback for animated response handling
-        def on_generate_2d_animated(response: AsyncResponse[Optional[Models.Gen2dResult]]):
-            self._on_image_generated_animated(response, cell_id)
+        Args:
+            enhanced_input: Input with the additional prompts already applied
+        """
+        # Check authentication
+        if not self.authSession.is_authenticated():
+            log.info("Gen2dBehaviour._submit_generation: Starting auto login")
+            self.authSession.auto_login(functools.partial(self._on_auto_login, enhanced_input))
+            return
         
-        # Start API call
-        self.masterApi.run_async_task(
-            self.masterApi.generate_2d, 
-            on_generate_2d_animated, 
-            token=token, 
-            gen2dInput=enhanced_input
-        )
+        # Show loading animation
+        cell_id = self._show_loading_animation()
+        
+        self._requests[cell_id] = enhanced_input
+        self._pending.append((cell_id, enhanced_input))
+        self._start_pending()
+    
+    def _retry(self, cell_id: int):
+        """Queue a failed generation again."""
+        enhanced_input = self._requests.get(cell_id)
+        if enhanced_input is None or cell_id not in self._inflight:
+            return
+        self._pending.append((cell_id, enhanced_input))
+        self._start_pending()
     
-    def _save_parameters(self, gen2dInput: Models.Gen2dInput):
+    def _start_pending(self):
+        """Send queued generations while there are free request slots."""
+        while self._pending and self._running < self.MAX_CONCURRENT_GENERATIONS:
+            cell_id, enhanced_input = self._pending.popleft()
+            # The token is read before a slot is taken: it raises when the session has logged out
+            # meanwhile (queued or retried generation), and the slot must not leak then
+            try:
+                token = self.authSession.token
+            except Exception as e:
+                log.error("Gen2dBehaviour._start_pending: no token for generation %d: %s", cell_id, e)
+                self._requests.pop(cell_id, None)
+                self._attempts.pop(cell_id, None)
+                self._handle_generation_error(e, cell_id)
+                continue
+            self._running += 1
+            # Start API call; the response is routed to the loading cell it belongs to
+            self.masterApi.run_async_task(
+                self.masterApi.generate_2d, 
+                functools.partial(self._on_image_generated_animated, cell_id=cell_id), 
+                token=token, 
+                gen2dInput=enhanced_input
+            )
+    
+    def _on_auto_login(self, enhanced_input: Models.Gen2dInput, response: AsyncResponse):
+        """Submit the generation once auto login has finished."""
+        if response.has_result():
+            self._submit_generation(enhanced_input)
+        else:
+            QMessageBox.critical(None, UIStrings.AUTH_ERROR_TITLE, UIStrings.AUTH_ERROR_TEXT)
+    
+    def _sync_prompt_edit(self, gen2dInput: Models.Gen2dInput):
         """
-        Save the generation parameters to project.
+        Show the prompt used for generation in the project window.
         
         Args:
-            gen2dInput: Input parameters to save
+            gen2dInput: Input parameters of the generation
         """
-        exporting.save_prop("prompt", gen2dInput.prompt)
-        exporting.save_prop("negative_prompt", gen2dInput.negative_prompt)
-        exporting.save_prop("slider_value", gen2dInput.control_strength)
-        
         if hasattr(self.prompt_edit, 'setText'):
             self.prompt_edit.setText(gen2dInput.prompt)
     
@@ -303,88 +381,212 @@ class Generate2dBehaviour(ProjectBehaviour):
             response: The async response containing the generated image result
             cell_id: ID of the loading cell to animate
         """
-        log.info("Gen2dBehaviour._on_image_generated_animated: callback entered")
-        try:
-            cell = self.gen2d.cells[cell_id]
-        except Exception as e:
-            FreeCAD.Console.PrintError(
-                f"Gen2dBehaviour._on_image_generated_animated: failed to get loading cell: {e}\n"
+        log.debug("Gen2dBehaviour._on_image_generated_animated: callback entered")
+        # The request slot is free again
+        self._running -= 1
+        self._start_pending()
+        
+        # Transient failures are retried with exponential backoff while the loading cell keeps running
+        attempts = self._attempts.get(cell_id, 0)
+        if isinstance(response.error, TransientAPIError) and attempts < self.MAX_RETRIES:
+            self._attempts[cell_id] = attempts + 1
+            delay_ms = self.RETRY_BASE_DELAY_MS * (2 ** attempts)
+            log.warning(
+                "Gen2dBehaviour: transient error, retry %d/%d in %d ms: %s",
+                attempts + 1, self.MAX_RETRIES, delay_ms, response.error
             )
-            self._on_image_generated(response)
+            QTimer.singleShot(delay_ms, functools.partial(self._retry, cell_id))
             return
-            
+        self._requests.pop(cell_id, None)
+        self._attempts.pop(cell_id, None)
+        
+        cell = self._inflight.get(cell_id)
         if isinstance(cell, LoadingCell):
             try:
-                cell.show_max_progress_and_close(lambda: self._on_image_generated(response), 1000)
+                cell.show_max_progress_and_close(functools.partial(self._on_image_generated, response, cell_id), 1000)
             except Exception as e:
-                FreeCAD.Console.PrintError(
-                    f"Gen2dBehaviour._on_image_generated_animated: animation error: {e}\n"
-                )
-                self._on_image_generated(response)
+                log.error("Gen2dBehaviour._on_image_generated_animated: animation error: %s", e)
+                self._on_image_generated(response, cell_id)
         else:
-            self._on_image_generated(response)
+            self._on_image_generated(response, cell_id)
     
-    def _on_image_generated(self, response: AsyncResponse[Optional[Models.Gen2dResult]]):
+    def _on_image_generated(self, response: AsyncResponse[Optional[Models.Gen2dResult]], cell_id: int):
         """
         Handle the completion of image generation.
         
         Args:
             response: The async response containing the generated image result
+            cell_id: ID of the loading cell of this generation
         """
         if response.has_error() or not response.has_result():
-            self._handle_generation_error(response.error)
+            self._handle_generation_error(response.error, cell_id)
             return
             
         if not response.result.image_base64:
             self._show_error_message(UIStrings.INVALID_CHARS_ERROR)
-            self._remove_loading_animation()
+            self._remove_loading_animation(cell_id)
             return
         
-        self._save_and_display_generated_image(response.result.image_base64)
+        # Hand the payload over and drop it from the response, which the loading
+        # cell animation and the task signal may still reference
+        image_base64 = response.result.image_base64
+        response.result.image_base64 = ""
+        self._save_and_display_generated_image(image_base64, cell_id)
     
-    def _handle_generation_error(self, error: Optional[Exception]):
+    def _handle_generation_error(self, error: Optional[Exception], cell_id: int):
         """
         Handle errors during image generation.
         
         Args:
             error: The error that occurred
+            cell_id: ID of the loading cell of this generation
         """
         error_msg = str(error) if error else "Unknown error"
         self._show_error_message(UIStrings.IMAGE_GEN_ERROR + error_msg)
-        self._remove_loading_animation()
+        self._remove_loading_animation(cell_id)
     
     # ==================== File & Gallery Management ====================
     
-    def _save_and_display_generated_image(self, image_base64: str):
+    def _save_and_display_generated_image(self, image_base64: str, cell_id: int):
         """
         Save the generated image and display it in the gallery.
         
+        The file is written in the background; the gallery is updated once it is on disk.
+        
         Args:
             image_base64: Base64 encoded image data
+            cell_id: ID of the loading cell to replace
         """
-        # Create directory if needed
         project_path = exporting.get_project_path()
-        gen_dir = f"{project_path}/{self.GENERATIONS_DIR}"
-        if not os.path.exists(gen_dir):
-            os.makedirs(gen_dir)
+        gen_dir = os.path.join(project_path, self.GENERATIONS_DIR)
+        
+        self.masterApi.run_async_task(
+            self._write_image,
+            # The project is fixed now, even if another document is active when the save is recorded
+            functools.partial(self._on_image_saved, cell_id=cell_id, project_path=project_path),
+            gen_dir,
+            gen_dir != self._gen_dir,
+            image_base64
+        )
+    
+    @classmethod
+    def _write_image(cls, gen_dir: str, create_dir: bool, image_base64: str) -> Tuple[str, Optional[QImage]]:
+        """
+        Decode a base64 image to disk (runs in a worker thread).
+        
+        The file is named after a hash of its contents, so an identical image
+        returned again (same seed and prompt) is not written a second time.
+        
+        Args:
+            gen_dir: Folder of the generated images
+            create_dir: Whether gen_dir may not exist yet
             
-        # Save image to file
-        timestamp = datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
-        path = f"{gen_dir}/{timestamp}.jpg"
+        Returns:
+            Path of the image file and its decoded gallery thumbnail (None if the
+            file already existed or the thumbnail is unavailable)
+        """
+        if create_dir:
+            os.makedirs(gen_dir, exist_ok=True)
+        
+        # Qt decodes into a QByteArray that is written as is and reused for the thumbnail.
+        # Slices keep the ASCII copy of the payload small instead of duplicating all of it.
+        data = QByteArray()
+        data.reserve(len(image_base64) // 4 * 3)
+        hasher = hashlib.blake2b(digest_size=16)
+        for start in range(0, len(image_base64), cls.B64_DECODE_CHUNK):
+            chunk = QByteArray.fromBase64(image_base64[start:start + cls.B64_DECODE_CHUNK].encode("ascii"))
+            hasher.update(chunk.data())
+            data.append(chunk)
+        
+        path = os.path.join(gen_dir, hasher.hexdigest() + cls._image_extension(data))
+        if os.path.exists(path):
+            return path, None
         
-        with open(path, "wb") as f:
-            f.write(base64.b64decode(image_base64))
+        file = QFile(path)
+        if not file.open(QIODevice.WriteOnly):
+            raise Exception(f"Failed to open {path}: {file.errorString()}")
+        try:
+            if file.write(data) != data.size():
+                raise Exception(f"Failed to write {path}: {file.errorString()}")
+        finally:
+            file.close()
+        
+        # Small copy for the gallery grid; it is also handed back so the cell is shown
+        # without reading the image again on the GUI thread
+        return path, write_thumbnail(path, data=data)
+    
+    @classmethod
+    def _image_extension(cls, data: QByteArray) -> str:
+        """File extension matching the format of the encoded image, so Qt picks the right reader by suffix."""
+        header = data.left(12).data()
+        for signature, extension in cls.IMAGE_SIGNATURES:
+            if header.startswith(signature):
+                if extension == ".webp" and header[8:12] != b"WEBP":
+                    continue
+                return extension
+        return ".jpg"
+    
+    def _on_image_saved(
+        self,
+        response: AsyncResponse[Tuple[str, Optional[QImage]]],
+        cell_id: int,
+        project_path: Optional[str] = None
+    ):
+        """
+        Replace the loading cell with the saved image (runs on the GUI thread).
+        
+        Args:
+            response: The async response containing the saved file path and its thumbnail
+            cell_id: ID of the loading cell to replace
+            project_path: Folder of the project the image was saved for
+        """
+        if response.has_error() or not response.has_result():
+            log.error("Gen2dBehaviour._on_image_saved: failed to save image: %s", response.error)
+            self._show_error_message(UIStrings.IMAGE_GEN_ERROR + str(response.error))
+            self._remove_loading_animation(cell_id)
+            return
+        
+        path, thumbnail = response.result
+        self._gen_dir = os.path.dirname(path)
+        
+        if any(cell.image_path == path for cell in self.gen2d.cells):
+            # Identical image already in the gallery: nothing new to show
+            log.debug("Gen2dBehaviour._on_image_saved: %s is already in the gallery", path)
+            self._remove_loading_animation(cell_id)
+            return
         
         # Replace loading animation with the generated image
-        cell = ImageCell(image_path=path)
-        cell_id = self.gen_stack.pop()
-        self.gen2d.change_cell(cell_id, cell)
+        if thumbnail is not None:
+            cell = ImageCell.from_pixmap(QPixmap.fromImage(thumbnail), image_path=path, thumb_path=thumbnail_path(path))
+        else:
+            cell = ImageCell(image_path=path, thumb_path=thumbnail_path(path))
+        index = self._loading_cell_index(cell_id)
+        self._inflight.pop(cell_id, None)
+        if index is not None:
+            self.gen2d.change_cell(index, cell)
+        else:
+            self.gen2d.add_cell(cell)
         
         # Connect action to show full view
-        cell.action.connect(lambda c: self.full_view.show(self._create_interactable(c)))
+        cell.action.connect(self._on_cell_action)
         
-        # Save to project data
-        exporting.save_arr_item(self.GENERATIONS_DIR, path)
+        # Save to project data (batched with other generations finishing close together)
+        self._pending_saves.setdefault(project_path, []).append(path)
+        self._save_timer.start()
+    
+    def _flush_saves(self, *_):
+        """Record all pending generated images in ProjectContext.json, one write per project (signal arguments are ignored)."""
+        # At shutdown the timer may already be destroyed on the C++ side
+        if shiboken is None or shiboken.isValid(self._save_timer):
+            self._save_timer.stop()
+        pending, self._pending_saves = self._pending_saves, {}
+        for project_path, paths in pending.items():
+            if paths:
+                exporting.save_arr_items(self.GENERATIONS_DIR, paths, project_path=project_path)
+    
+    def _on_cell_action(self, cell: ImageCell):
+        """Open a generated image in the full view."""
+        self.full_view.show(self._create_interactable(cell))
     
     def _create_interactable(self, cell: ImageCell) -> Optional[FullViewWindowData]:
         """
@@ -404,32 +606,57 @@ class Generate2dBehaviour(ProjectBehaviour):
             buttons=[
                 FullViewButtonData(
                     name=UIStrings.DELETE_BUTTON,
-                    action=lambda: self._delete_cell(cell)
+                    # Weak reference: the open full view must not keep a removed cell alive
+                    action=functools.partial(self._delete_cell, weakref.ref(cell))
                 ),
                 FullViewButtonData(
                     name=UIStrings.CLOSE_BUTTON,
-                    action=lambda: self.full_view.close()
+                    action=self.full_view.close
                 )
             ]
         )
     
-    def _delete_cell(self, cell: ImageCell):
+    def _delete_cell(self, cell_ref: "weakref.ref[ImageCell]", *_):
         """
         Delete a cell from the gallery.
         
         Args:
-            cell: The cell to delete
+            cell_ref: Weak reference to the cell to delete (extra signal arguments are ignored)
         """
+        cell = cell_ref()
+        if cell is None:
+            self.full_view.close()
+            return
+        try:
+            cell.action.disconnect(self._on_cell_action)
+        except (RuntimeError, TypeError):
+            pass
+        for paths in self._pending_saves.values():
+            if cell.image_path in paths:
+                paths.remove(cell.image_path)
         self.gen2d.remove(cell.index)
         exporting.remove_arr_item(self.GENERATIONS_DIR, cell.image_path)
         self.full_view.close()
 
     # ==================== Lifecycle ====================
     
+    def stop(self):
+        """Record pending generated images right away instead of waiting for the save timer."""
+        self._flush_saves()
+    
     def __del__(self):
         """Destructor to clean up resources."""
-        log.info(f"Generate2dBehaviour instance {id(self)} being deleted.\n")
-        if hasattr(self, 'selectBestSketch') and self.selectBestSketch:
-            self.selectBestSketch.close()
-            self.selectBestSketch.deleteLater()
+        log.debug("Generate2dBehaviour instance %d being deleted.", id(self))
+        # __init__ may have bailed out before the selector was created
+        selector = getattr(self, 'selectBestSketch', None)
+        if selector is None:
+            return
+        # At shutdown Qt may have destroyed the dialog before this wrapper is collected
+        if shiboken is not None and not shiboken.isValid(selector):
+            return
+        try:
+            selector.close()
+            selector.deleteLater()
+        except RuntimeError:
+            pass
 
@@ -5,23 +5,30 @@ This module handles the UI and state management for preparing
 data to send to the 2D generation API.
 """
 import base64
-import time
-from typing import Callable, Optional
+import os
+import re
+import random
+from typing import Callable, Dict, Optional, Tuple
 
 import FreeCADGui
 import FreeCAD
-from PySide.QtCore import Qt
+from PySide.QtCore import Qt, QThreadPool
 from PySide.QtWidgets import (
     QLabel, QSlider, QGraphicsOpacityEffect,
     QGraphicsBlurEffect, QPushButton, QMessageBox, QWidget,
-    QTextEdit
+    QPlainTextEdit
 )
 
 from tools.project_context.pipelines.form_window import FormWindow
 from tools import exporting, models
+from tools.master_api import AsyncTask
 from tools.project_context.utils.gallery_utils import GalleryWidget, GalleryStyle, GalleryCell
 
 
+# Characters that cannot be encoded as UTF-8 (unpaired UTF-16 surrogates)
+_LONE_SURROGATE_RE = re.compile('[\ud800-\udfff]')
+
+
 class UIStrings:
     """Constant strings used in the UI."""
     WINDOW_TITLE = "Select Best Sketch for 2D Generation"
@@ -50,6 +57,11 @@ class PrepareFor2dGen(FormWindow):
     Inherits basic window setup and sizing from FormWindow.
     """
     
+    # Raw bytes read per step when encoding the sketch (multiple of 3)
+    B64_ENCODE_CHUNK = 57 * 1024
+    # Blur applied to the sketches that are not selected
+    BLUR_RADIUS = 5
+    
     def __init__(
         self,
         sketches: GalleryWidget,
@@ -68,11 +80,19 @@ class PrepareFor2dGen(FormWindow):
 
         self.onApprove = onApprove
         self.selected_sketch_path: Optional[str] = None
+        self._prev_selected_index: Optional[int] = None
         self.input_sketches_widget = sketches
-        self.project_model = exporting.load()
+        self.project_model = exporting.load_cached()
         self.selection_gallery: Optional[GalleryWidget] = None
-        self.prompt_edit: Optional[QTextEdit] = None
-        self.n_prompt_edit: Optional[QTextEdit] = None
+        self.prompt_edit: Optional[QPlainTextEdit] = None
+        self.n_prompt_edit: Optional[QPlainTextEdit] = None
+        # Encoded sketches: path -> (mtime, base64 bytes); reused while the file is unchanged
+        self._b64_cache: Dict[str, Tuple[float, bytes]] = {}
+        # Background approve step in progress and the parameters it was started with
+        self._approve_task: Optional[AsyncTask] = None
+        self._approve_params: dict = {}
+        # Set once the dialog is closed; a finishing approve step is then dropped
+        self._closed = False
         
         self._setup_header()
         self._setup_gallery()
@@ -108,15 +128,8 @@ class PrepareFor2dGen(FormWindow):
         available_width = self.advisable_width - 40  # margins
         available_height = int(self.advisable_height * 0.5)  # gallery takes ~50% of window height
         
-        # Find the tallest aspect ratio among input images (height/width)
-        max_aspect_ratio = 1.0  # default to square
-        for cell in self.input_sketches_widget.cells:
-            if hasattr(cell, 'pixmap') and cell.pixmap and not cell.pixmap.isNull():
-                w = cell.pixmap.width()
-                h = cell.pixmap.height()
-                if w > 0:
-                    aspect = h / w
-                    max_aspect_ratio = max(max_aspect_ratio, aspect)
+        # Tallest aspect ratio among input images (height/width), cached by the source gallery
+        max_aspect_ratio = self.input_sketches_widget.max_aspect_ratio()
         
         # Calculate max cell width to fit 3 images horizontally
         max_width_by_cols = int((available_width - gap * (number_of_cols - 1)) / number_of_cols)
@@ -144,14 +157,11 @@ class PrepareFor2dGen(FormWindow):
         )
         
         self.selection_gallery = GalleryWidget(style)
-        self.selection_gallery.add_cells([cell.copy() for cell in self.input_sketches_widget.cells])
+        self.selection_gallery.add_cells(cell.copy() for cell in self.input_sketches_widget.cells)
         
+        # trigger() only emits for cells with an index, so the slot always gets a valid one
         for cell in self.selection_gallery.cells:
-            if cell.index is not None:
-                cell.action.connect(
-                    lambda bound_cell=cell: self._handle_sketch_selection(bound_cell.index) 
-                    if bound_cell.index is not None else None
-                )
+            cell.selected.connect(self._handle_sketch_selection)
             
         self.formLayout.addRow(self.selection_gallery)
         
@@ -167,7 +177,7 @@ class PrepareFor2dGen(FormWindow):
         self.prompt_label = QLabel(UIStrings.PROJECT_CONTEXT_LABEL)
         self.formLayout.addRow(self.prompt_label)
         
-        self.prompt_edit = QTextEdit()
+        self.prompt_edit = QPlainTextEdit()
         self.prompt_edit.setMinimumHeight(80)
         self.prompt_edit.setPlainText(getattr(self.project_model, 'prompt', ''))
         self.formLayout.addRow(self.prompt_edit)
@@ -175,7 +185,7 @@ class PrepareFor2dGen(FormWindow):
         self.n_prompt_label = QLabel(UIStrings.NEGATIVE_PROMPT_LABEL)
         self.formLayout.addRow(self.n_prompt_label)
         
-        self.n_prompt_edit = QTextEdit()
+        self.n_prompt_edit = QPlainTextEdit()
         self.n_prompt_edit.setMinimumHeight(80)
         self.n_prompt_edit.setPlainText(getattr(self.project_model, 'negative_prompt', ''))
         self.formLayout.addRow(self.n_prompt_edit)
@@ -198,21 +208,34 @@ class PrepareFor2dGen(FormWindow):
             return
         
         selected_cell = self.selection_gallery.cells[index]
-        if hasattr(selected_cell, 'image_path'):
-            self.selected_sketch_path = selected_cell.image_path  # type: ignore[attr-defined]
-        
-        if hasattr(selected_cell, 'label'):
-            selected_cell.label.setStyleSheet(
-                "border: 3px solid rgba(0, 160, 200, 0.9); border-radius: 15px;"
-            )  # type: ignore[attr-defined]
-            selected_cell.label.setGraphicsEffect(None)  # type: ignore[attr-defined]
-            selected_cell.label.setWindowOpacity(1.0)  # type: ignore[attr-defined]
-        
-        for i, cell in enumerate(self.selection_gallery.cells):
-            if i != index:
-                self._apply_effects_to_cell(cell, blur=True, opacity=0.5)
+        if selected_cell.image_path is not None:
+            self.selected_sketch_path = selected_cell.image_path
+        
+        prev_index = self._prev_selected_index
+        if prev_index == index:
+            return
+        
+        # Restyle only the cells that change, with a single repaint at the end
+        self.selection_gallery.setUpdatesEnabled(False)
+        try:
+            if prev_index is None:
+                # First selection: dim every other cell
+                dimmed = [cell for i, cell in enumerate(self.selection_gallery.cells) if i != index]
             else:
-                self._apply_effects_to_cell(cell, blur=False, opacity=1.0)
+                # Only the previously selected cell needs dimming again
+                dimmed = [self.selection_gallery.cells[prev_index]]
+            for cell in dimmed:
+                self._apply_effects_to_cell(cell, blur=True, opacity=0.5)
+            
+            if selected_cell.label is not None:
+                selected_cell.label.setStyleSheet(
+                    "border: 3px solid rgba(0, 160, 200, 0.9); border-radius: 15px;"
+                )
+            self._apply_effects_to_cell(selected_cell, blur=False, opacity=1.0)
+        finally:
+            self.selection_gallery.setUpdatesEnabled(True)
+        
+        self._prev_selected_index = index
     
     def _apply_effects_to_cell(self, cell: GalleryCell, blur: bool, opacity: float):
         """
@@ -223,63 +246,96 @@ class PrepareFor2dGen(FormWindow):
             blur: Whether to apply blur (True) or remove it (False).
             opacity: The desired window opacity (e.g., 1.0 for full, 0.5 for semi-transparent).
         """
-        if not hasattr(cell, 'label'):
+        if cell.label is None:
             return
             
         label = cell.label
+        effect = label.graphicsEffect()
         if blur:
-            current_effect = label.graphicsEffect()
-            if not isinstance(current_effect, QGraphicsBlurEffect):
-                blur_effect = QGraphicsBlurEffect(label)
-                blur_effect.setBlurRadius(5)
-                label.setGraphicsEffect(blur_effect)
-            elif current_effect.blurRadius() != 5:
-                current_effect.setBlurRadius(5)
+            # The blur effect is created once per label and then only toggled
+            if not isinstance(effect, QGraphicsBlurEffect):
+                effect = QGraphicsBlurEffect(label)
+                effect.setBlurRadius(self.BLUR_RADIUS)
+                label.setGraphicsEffect(effect)
+            effect.setEnabled(True)
             label.setStyleSheet("border: 0px;")
-        else:
-            label.setGraphicsEffect(None)
+        elif effect is not None:
+            # Disable rather than setGraphicsEffect(None), which would delete the effect
+            effect.setEnabled(False)
         
         label.setWindowOpacity(opacity)
 
     def _handle_approve(self):
         """
-        Validate inputs and call onApprove callback with generation parameters.
-        """
-        if not self._validate_inputs():
-            FreeCAD.Console.PrintError("_handle_approve: Invalid inputs. Not calling onApprove.\n")
-            return
-            
-        try:
-            image_bytes_b64 = self._encode_selected_image()
-            if image_bytes_b64 is None:
-                QMessageBox.critical(self, "Ошибка кодирования", "Не удалось закодировать изображение")
-                FreeCAD.Console.PrintError("\n_handle_approve: Failed to encode selected image.\n")
-                return
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка кодирования", f"Не удалось закодировать изображение: {e}")
-            FreeCAD.Console.PrintError(f"\n_handle_approve: Failed to encode selected image: {e}\n")
-            return
+        Validate inputs and start preparing the generation parameters.
         
+        Encoding the sketch runs in the background; the parameters are saved and
+        onApprove is called from _finish_approve once it is done.
+        """
         if not self.prompt_edit or not self.n_prompt_edit:
+            FreeCAD.Console.PrintWarning("_handle_approve: UI elements not initialized\n")
             QMessageBox.critical(self, "Ошибка", "Внутренняя ошибка: элементы UI не инициализированы")
             return
 
+        # Read the editors once; the same strings are validated and sent
         current_prompt = self.prompt_edit.toPlainText().strip()
         current_neg_prompt = self.n_prompt_edit.toPlainText().strip()
-        current_slider_val = self.realism_slider.value() / 100.0
+        if not self._validate_inputs(current_prompt, current_neg_prompt):
+            FreeCAD.Console.PrintError("_handle_approve: Invalid inputs. Not calling onApprove.\n")
+            return
 
-        exporting.save_props({
+        current_slider_val = self.realism_slider.value() / 100.0
+        self._approve_params = {
             "prompt": current_prompt,
             "negative_prompt": current_neg_prompt,
             "slider_value": current_slider_val
-        })
+        }
+
+        # Prevent double submits while the background step runs
+        self.approve_button.setEnabled(False)
+        task = AsyncTask(self._encode_image, self.selected_sketch_path)
+        task.signals.setParent(self)
+        task.signals.finished.connect(self._finish_approve)
+        self._approve_task = task
+        QThreadPool.globalInstance().start(task)
+    
+    def _finish_approve(self, image_bytes_b64: Optional[bytes], error: Optional[Exception]):
+        """
+        Build the generation input and call onApprove (runs on the GUI thread).
+        
+        Args:
+            image_bytes_b64: Base64 encoded sketch, None on error
+            error: Error raised while encoding, if any
+        """
+        self._approve_task = None
+        if self._closed:
+            # The dialog was dismissed while the sketch was being encoded
+            FreeCAD.Console.PrintMessage("_finish_approve: Dialog closed, generation not started\n")
+            return
+        self.approve_button.setEnabled(True)
+        
+        if error is not None or image_bytes_b64 is None:
+            FreeCAD.Console.PrintError(f"\n_handle_approve: Failed to encode selected image: {error}\n")
+            if isinstance(error, FileNotFoundError):
+                QMessageBox.critical(
+                    self, "Ошибка файла", 
+                    f"Не удалось найти файл изображения: {self.selected_sketch_path}"
+                )
+            elif isinstance(error, IOError):
+                QMessageBox.critical(self, "Ошибка файла", f"Не удалось прочитать файл изображения: {error}")
+            else:
+                QMessageBox.critical(self, "Ошибка кодирования", f"Не удалось закодировать изображение: {error}")
+            return
 
+        params = self._approve_params
+        # FreeCAD.ActiveDocument and the project name are only touched on the GUI thread
+        exporting.save_props(params)
         gen2d_input = models.Gen2dInput(
             image_base64=image_bytes_b64.decode('utf-8'),
-            prompt=current_prompt,
-            control_strength=current_slider_val,
-            negative_prompt=current_neg_prompt,
-            seed=int(time.time()) % 10000
+            prompt=params["prompt"],
+            control_strength=params["slider_value"],
+            negative_prompt=params["negative_prompt"],
+            seed=random.randrange(10000)
         )
         QMessageBox.information(self, UIStrings.SUCCESS_TITLE, UIStrings.SUCCESS_TEXT)
         
@@ -291,10 +347,19 @@ class PrepareFor2dGen(FormWindow):
         
         self.close()
     
-    def _validate_inputs(self) -> bool:
+    def closeEvent(self, event):
+        """Mark the dialog closed so a pending approve step does not start a generation."""
+        self._closed = True
+        super().closeEvent(event)
+    
+    def _validate_inputs(self, prompt_text: str, neg_prompt_text: str) -> bool:
         """
         Validate all user inputs.
         
+        Args:
+            prompt_text: Stripped text of the prompt editor
+            neg_prompt_text: Stripped text of the negative prompt editor
+            
         Returns:
             True if all inputs are valid, False otherwise
         """
@@ -303,25 +368,16 @@ class PrepareFor2dGen(FormWindow):
             QMessageBox.warning(self, UIStrings.NO_SKETCH_TITLE, UIStrings.NO_SKETCH_TEXT)
             return False
         
-        if not self.prompt_edit or not self.n_prompt_edit:
-            FreeCAD.Console.PrintWarning("_validate_inputs: UI elements not initialized\n")
-            QMessageBox.warning(self, "Ошибка", "Внутренняя ошибка: элементы UI не инициализированы")
-            return False
-            
-        prompt_text = self.prompt_edit.toPlainText().strip()
         if not prompt_text:
             FreeCAD.Console.PrintWarning("_validate_inputs: Empty prompt\n")
             QMessageBox.warning(self, UIStrings.NO_CONTEXT_TITLE, UIStrings.NO_CONTEXT_TEXT)
             return False
         
-        # Validate that text can be encoded as UTF-8 (supports all languages including Russian)
-        neg_prompt_text = self.n_prompt_edit.toPlainText().strip()
-        try:
-            prompt_text.encode('utf-8')
-            neg_prompt_text.encode('utf-8')
-        except UnicodeEncodeError as e:
-            bad_char = e.object[e.start:e.end]
-            FreeCAD.Console.PrintWarning(f"_validate_inputs: Invalid character '{bad_char}'\n")
+        # Any str is valid UTF-8 except lone surrogates; scan for those instead of encoding both prompts
+        match = _LONE_SURROGATE_RE.search(prompt_text) or _LONE_SURROGATE_RE.search(neg_prompt_text)
+        if match:
+            bad_char = match.group()
+            FreeCAD.Console.PrintWarning(f"_validate_inputs: Invalid character {bad_char!r}\n")
             QMessageBox.warning(
                 self, UIStrings.INVALID_INPUT_TITLE, 
                 f"{UIStrings.INVALID_INPUT_TEXT} Слово: '{bad_char}'"
@@ -330,26 +386,28 @@ class PrepareFor2dGen(FormWindow):
             
         return True
     
-    def _encode_selected_image(self) -> Optional[bytes]:
+    def _encode_image(self, path: str) -> bytes:
         """
-        Encode the selected sketch image as base64.
+        Encode a sketch image as base64 (safe to call from a worker thread).
         
+        Args:
+            path: Path of the sketch image
+            
         Returns:
-            Base64 encoded image bytes, or None if an error occurs.
+            Base64 encoded image bytes
+            
+        Raises:
+            OSError: If the file cannot be found or read
         """
-        if not self.selected_sketch_path:
-            QMessageBox.critical(self, "Ошибка", "Внутренняя ошибка: Изображение не выбрано для кодирования.")
-            return None
-        try:
-            with open(self.selected_sketch_path, "rb") as f:
-                return base64.b64encode(f.read())
-        except FileNotFoundError:
-            QMessageBox.critical(
-                self, "Ошибка файла", 
-                f"Не удалось найти файл изображения: {self.selected_sketch_path}"
-            )
-            return None
-        except IOError as e:
-            QMessageBox.critical(self, "Ошибка файла", f"Не удалось прочитать файл изображения: {e}")
-            return None
-
+        mtime = os.stat(path).st_mtime
+        cached = self._b64_cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        # Encode chunk by chunk; chunk size is a multiple of 3, so no padding appears mid-stream
+        buf = bytearray()
+        with open(path, "rb") as f:
+            while chunk := f.read(self.B64_ENCODE_CHUNK):
+                buf += base64.b64encode(chunk)
+        encoded = bytes(buf)
+        self._b64_cache[path] = (mtime, encoded)
+        return encoded
@@ -4,13 +4,11 @@ Gen 3D Behaviour Module.
 This module handles the 3D generation pipeline:
 - Polling for generation status
 - Downloading generated model files
-- Processing ZIP archives
+- Extracting ZIP archives
 - Updating gallery with results
 """
 import os
 import asyncio
-import zipfile
-import shutil
 from typing import Optional, Callable
 
 import FreeCADGui
@@ -39,7 +37,14 @@ class Generate3dBehaviour(ProjectBehaviour):
     """
     
     GENERATIONS_DIR = "generations3d"
-    UPDATE_RATE_SECONDS = 2
+    UPDATE_RATE_SECONDS = 1.0  # Initial delay between status polls
+    MIN_UPDATE_RATE_SECONDS = 0.5
+    MAX_UPDATE_RATE_SECONDS = 5.0
+    UPDATE_RATE_BACKOFF = 1.5
+    # With a server ETA, poll about five times over the remaining time
+    ETA_POLL_FRACTION = 0.2
+    # Model formats in download priority order: (Gen3dModel field, file extension)
+    FORMAT_PRIORITY = Models.GEN3D_FORMAT_PRIORITY
     
     def __init__(
         self, 
@@ -83,15 +88,57 @@ class Generate3dBehaviour(ProjectBehaviour):
     # ==================== Polling ====================
         
     async def _poll_for_completion(self):
-        """Poll the API until generation is complete."""
+        """
+        Poll the API until generation is complete.
+        
+        The delay follows the server-reported estimated time (a fifth of it,
+        between MIN_ and MAX_UPDATE_RATE_SECONDS); without an estimate it
+        grows exponentially up to MAX_UPDATE_RATE_SECONDS.
+        """
+        backoff = self.UPDATE_RATE_SECONDS
         while self.is_loading:
-            await self._check_generation_status()
-            await asyncio.sleep(self.UPDATE_RATE_SECONDS)
+            result = await self._check_generation_status()
+            if not self.is_loading:
+                break
+            estimated_time = result.estimated_time if result else None
+            if estimated_time and estimated_time > 0:
+                delay = max(self.MIN_UPDATE_RATE_SECONDS,
+                            min(self.MAX_UPDATE_RATE_SECONDS, estimated_time * self.ETA_POLL_FRACTION))
+            else:
+                delay = backoff
+                backoff = min(self.MAX_UPDATE_RATE_SECONDS, backoff * self.UPDATE_RATE_BACKOFF)
+            await asyncio.sleep(delay)
+        
+    async def _wait_for_auto_login(self) -> bool:
+        """
+        Log in with saved credentials and wait for the result before polling again.
         
-    async def _check_generation_status(self):
-        """Check the current generation status from API."""
-        if not self.auth_session.token:
-            self.auth_session.auto_login(callback=lambda: self._check_generation_status())
+        Returns:
+            True if a token is available afterwards
+        """
+        loop = asyncio.get_running_loop()
+        token_ready = asyncio.Event()
+        # The callback may run on another thread; the event is set on this loop
+        login_callback = lambda response: loop.call_soon_threadsafe(token_ready.set)
+        # auto_login makes blocking HTTP requests: keep them off this loop
+        await loop.run_in_executor(None, self.auth_session.auto_login, login_callback)
+        await token_ready.wait()
+        return self._has_token()
+
+    def _has_token(self) -> bool:
+        """Whether the session has an access token (is_authenticated logs on every call; this runs per poll)."""
+        return self.auth_session.auth_service.access_token is not None
+
+    async def _check_generation_status(self) -> Optional[Models.Gen3dResult]:
+        """
+        Check the current generation status from API.
+        
+        Returns:
+            The in-progress result (for scheduling the next poll), None otherwise
+        """
+        if not self._has_token() and not await self._wait_for_auto_login():
+            log.error("Generate3dBehaviour: Auto login failed, stopping status polling")
+            self.is_loading = False
             return
        
         try:
@@ -116,7 +163,7 @@ class Generate3dBehaviour(ProjectBehaviour):
             try:
                 self.view_3d_data = Models.Gen3dSaved(
                     local=None, 
-                    online=result.model_dump(), 
+                    online=result, 
                     obj_id=task_id
                 )
             except Exception as e:
@@ -125,7 +172,7 @@ class Generate3dBehaviour(ProjectBehaviour):
                 return
             
             await self._download_model_files(
-                root_folder=f"{exporting.get_project_path()}/{self.GENERATIONS_DIR}",
+                root_folder=os.path.join(exporting.get_project_path(), self.GENERATIONS_DIR),
                 name=task_id
             )
 
@@ -134,8 +181,10 @@ class Generate3dBehaviour(ProjectBehaviour):
             # Generation still in progress - update progress
             progress = result.progress if result.progress is not None else 0
             estimated_time = getattr(result, 'estimated_time', None)
-            self.loading_cell.update_progress(int(progress), estimated_time=estimated_time)
-            log.debug(f"Generate3dBehaviour: Progress: {progress}%, estimated_time: {estimated_time}")
+            # Called from the polling worker: the cell applies the latest value on the GUI thread
+            self.loading_cell.post_progress(int(progress), estimated_time=estimated_time)
+            log.debug("Generate3dBehaviour: Progress: %s%%, estimated_time: %s", progress, estimated_time)
+            return result
 
     # ==================== File Download ====================
 
@@ -149,51 +198,48 @@ class Generate3dBehaviour(ProjectBehaviour):
         """
         try:
             gen_3d_result = self.view_3d_data.online
-            obj_url = gen_3d_result.object.obj_url
-            fbx_url = gen_3d_result.object.fbx_url
-            usdz_url = gen_3d_result.object.usdz_url
-            glb_url = gen_3d_result.object.glb_url
+            model_urls = [
+                (attr, ext, getattr(gen_3d_result.object, attr))
+                for attr, ext in self.FORMAT_PRIORITY
+            ]
 
-            folder = f"{root_folder}/{name}"
-            if not os.path.exists(folder):
-                os.makedirs(folder)
+            folder = os.path.join(root_folder, name)
+            os.makedirs(folder, exist_ok=True)
             
             # Build download list
             from_to_source = []
-            is_zip_file = False
+            zip_url = None
+            model_attr = None
             
             # Check for ZIP files first (priority)
-            for url in [obj_url, glb_url, fbx_url, usdz_url]:
+            for _, _, url in model_urls:
                 if url and url.strip() and self._is_zip_url(url):
-                    is_zip_file = True
-                    from_to_source.append((url, f"{folder}/{name}.zip"))
-                    log.debug(f"Generate3dBehaviour: Detected ZIP archive URL")
+                    zip_url = url
+                    log.debug("Generate3dBehaviour: Detected ZIP archive URL")
                     break
+            is_zip_file = zip_url is not None
             
-            # If no ZIP found, use regular format selection
+            # If no ZIP found, use the first available format
             if not is_zip_file:
-                if obj_url and obj_url.strip():
-                    from_to_source.append((obj_url, f"{folder}/{name}.obj"))
-                elif glb_url and glb_url.strip():
-                    from_to_source.append((glb_url, f"{folder}/{name}.glb"))
-                elif fbx_url and fbx_url.strip():
-                    from_to_source.append((fbx_url, f"{folder}/{name}.fbx"))
-                elif usdz_url and usdz_url.strip():
-                    from_to_source.append((usdz_url, f"{folder}/{name}.usdz"))
+                for attr, ext, url in model_urls:
+                    if url and url.strip():
+                        model_attr = attr
+                        from_to_source.append((url, os.path.join(folder, name + ext)))
+                        break
 
             # Handle textures
             texture_urls = self._build_texture_download_list(gen_3d_result, folder, name)
             
-            # Download all files
+            # Download all files; a ZIP archive is extracted while it is downloaded
+            master_api = self.auth_session.masterAPI
             all_downloads = from_to_source + texture_urls
-            await self.auth_session.masterAPI.download_files(all_downloads)
-            
-            # Process ZIP if needed
-            if is_zip_file and from_to_source:
-                await self._process_zip_archive(from_to_source[0][1], folder, name)
+            downloads = [master_api.download_files(all_downloads)]
+            if is_zip_file:
+                downloads.append(master_api.download_zip_extract(zip_url, folder, self._zip_targets(name)))
+            await asyncio.gather(*downloads)
 
             # Update model data with local paths
-            self._update_local_paths(folder, name, from_to_source, texture_urls, is_zip_file)
+            self._update_local_paths(folder, name, from_to_source, texture_urls, is_zip_file, model_attr)
             
             exporting.save_arr_item(self.GENERATIONS_DIR, self.view_3d_data.model_dump())
         
@@ -202,11 +248,7 @@ class Generate3dBehaviour(ProjectBehaviour):
 
     def _is_zip_url(self, url: str) -> bool:
         """Check if URL points to a ZIP file."""
-        if not url:
-            return False
-        url_without_query = url.split('?')[0] if '?' in url else url
-        url_lower = url_without_query.lower()
-        return url_lower.endswith(".zip") or ".zip" in url_lower
+        return Models.is_zip_url(url)
 
     def _build_texture_download_list(
         self, 
@@ -219,63 +261,35 @@ class Generate3dBehaviour(ProjectBehaviour):
         texture = gen_3d_result.texture if gen_3d_result.texture else None
         
         if texture:
-            # Support both old and new API field names
-            base_color = getattr(texture, 'base_color_url', None) or getattr(texture, 'base_color_texture', None)
-            metallic = getattr(texture, 'metallic_url', None) or getattr(texture, 'metallic_texture', None)
-            roughness = getattr(texture, 'roughness_url', None) or getattr(texture, 'roughness_texture', None)
-            normal = getattr(texture, 'normal_url', None) or getattr(texture, 'normal_texture', None)
+            # Old and new API field names are normalized by Gen3dTexture
+            base_color = texture.base_color_url
+            metallic = texture.metallic_url
+            roughness = texture.roughness_url
+            normal = texture.normal_url
             
             if base_color:
-                texture_urls.append((base_color, f"{folder}/{name}_base_color.png"))
+                texture_urls.append((base_color, os.path.join(folder, f"{name}_base_color.png")))
             if metallic:
-                texture_urls.append((metallic, f"{folder}/{name}_metallic.png"))
+                texture_urls.append((metallic, os.path.join(folder, f"{name}_metallic.png")))
             if roughness:
-                texture_urls.append((roughness, f"{folder}/{name}_roughness.png"))
+                texture_urls.append((roughness, os.path.join(folder, f"{name}_roughness.png")))
             if normal:
-                texture_urls.append((normal, f"{folder}/{name}_normal.png"))
+                texture_urls.append((normal, os.path.join(folder, f"{name}_normal.png")))
         
         return texture_urls
 
-    async def _process_zip_archive(self, zip_path: str, folder: str, name: str):
-        """Extract and process ZIP archive."""
-        if not os.path.exists(zip_path):
-            return
-            
-        try:
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                zip_ref.extractall(folder)
-            
-            # Find and rename files
-            extracted_files = os.listdir(folder)
-            obj_file_path = None
-            material_png_path = None
-            
-            for file in extracted_files:
-                file_path = os.path.join(folder, file)
-                if file.lower() == "model.obj":
-                    obj_file_path = file_path
-                elif file.lower() == "material_0.png":
-                    material_png_path = file_path
-            
-            # Rename material_0.png to base_color_texture.png
-            if material_png_path and os.path.exists(material_png_path):
-                base_color_path = os.path.join(folder, "base_color_texture.png")
-                shutil.move(material_png_path, base_color_path)
-                log.debug("Generate3dBehaviour: Renamed material_0.png to base_color_texture.png")
-            
-            # Rename model.obj to {name}.obj
-            if obj_file_path:
-                final_obj_path = os.path.join(folder, f"{name}.obj")
-                if obj_file_path != final_obj_path:
-                    shutil.move(obj_file_path, final_obj_path)
-            
-            # Remove ZIP file
-            os.remove(zip_path)
-            log.debug(f"Generate3dBehaviour: Extracted and processed zip archive")
-            
-        except Exception as e:
-            log.error(f"Generate3dBehaviour: Failed to extract zip file: {e}")
-            raise
+    def _zip_targets(self, name: str) -> dict[str, str]:
+        """
+        Map of ZIP members to extract to their final file names.
+        
+        model.obj -> {name}.obj, material_0.png -> base_color_texture.png;
+        material.mtl keeps its name since the OBJ references it.
+        """
+        return {
+            "model.obj": f"{name}.obj",
+            "material.mtl": "material.mtl",
+            "material_0.png": "base_color_texture.png",
+        }
 
     def _update_local_paths(
         self, 
@@ -283,9 +297,15 @@ class Generate3dBehaviour(ProjectBehaviour):
         name: str, 
         from_to_source: list, 
         texture_urls: list, 
-        is_zip_file: bool
+        is_zip_file: bool,
+        model_attr: Optional[str] = None
     ):
-        """Update view_3d_data with local file paths."""
+        """
+        Update view_3d_data with local file paths.
+        
+        Args:
+            model_attr: Gen3dModel field of the downloaded (non-ZIP) model file
+        """
         gen_3d_result = self.view_3d_data.online
         
         # Build local texture info
@@ -315,22 +335,12 @@ class Generate3dBehaviour(ProjectBehaviour):
             obj_url=""
         )
         
-        if from_to_source:
-            local_path = from_to_source[0][1]
-            local_path_lower = local_path.lower()
-            
-            if is_zip_file:
-                obj_file_path = os.path.join(folder, f"{name}.obj")
-                if os.path.exists(obj_file_path):
-                    local_model.obj_url = obj_file_path
-            elif local_path_lower.endswith(".glb"):
-                local_model.glb_url = local_path
-            elif local_path_lower.endswith(".fbx"):
-                local_model.fbx_url = local_path
-            elif local_path_lower.endswith(".usdz"):
-                local_model.usdz_url = local_path
-            elif local_path_lower.endswith(".obj"):
-                local_model.obj_url = local_path
+        if is_zip_file:
+            obj_file_path = os.path.join(folder, f"{name}.obj")
+            if os.path.exists(obj_file_path):
+                local_model.obj_url = obj_file_path
+        elif from_to_source and model_attr:
+            setattr(local_model, model_attr, from_to_source[0][1])
         
         self.view_3d_data = Models.Gen3dSaved(
             local=Models.Gen3dResult(
@@ -364,5 +374,5 @@ class Generate3dBehaviour(ProjectBehaviour):
             return
         
         self.view_3d_data = response.result
-        log.info(f"Generate3dBehaviour: Download complete: {self.view_3d_data}")
+        log.debug("Generate3dBehaviour: Download complete: %s", self.view_3d_data)
         self.gallery.change_cell(self.index, View3DCell(self.view_3d_data, self.view_3d_style))
@@ -6,6 +6,7 @@ data to send to the 3D generation API.
 Includes multi-view selection interface.
 """
 import base64
+import functools
 import os
 from typing import Optional, Callable
 
@@ -21,7 +22,9 @@ from PySide.QtGui import QPixmap
 from tools.project_context.pipelines.form_window import FormWindow
 from tools.authentication.authentication import AuthenticatedSession
 from tools import exporting, models
-from tools.project_context.utils.gallery_utils import GalleryWidget, GalleryCell, GalleryStyle
+from tools.project_context.utils.gallery_utils import (
+    GalleryWidget, GalleryCell, GalleryStyle, read_image
+)
 from tools.project_context.utils import MultiViewCell
 from tools.models import AsyncResponse
 import tools.log as log
@@ -79,6 +82,11 @@ class UIStrings:
 
 class ViewSelectionWindow(QWidget):
     """Separate window for selecting generated images for a specific view type."""
+
+    SELECTION_STYLE = """
+        QLabel { border: 0px; }
+        QLabel[selected="true"] { border: 3px solid rgba(0, 160, 200, 0.9); border-radius: 15px; }
+    """
     
     def __init__(
         self, 
@@ -91,6 +99,7 @@ class ViewSelectionWindow(QWidget):
         
         self.view_type = view_type
         self.selected_image_path: Optional[str] = None
+        self._selected_cell_index: Optional[int] = None
         self.generations = generations
         self.on_image_selected = on_image_selected
         
@@ -148,15 +157,13 @@ class ViewSelectionWindow(QWidget):
         )
         
         self.gallery_widget = GalleryWidget(self.gallery_style)
-        self.gallery_widget.add_cells([cell.copy() for cell in self.generations.cells])
+        # Selection is drawn through the "selected" label property, so clicks only repolish two labels
+        self.gallery_widget.setStyleSheet(self.SELECTION_STYLE)
+        self.gallery_widget.add_cells(cell.copy() for cell in self.generations.cells)
         
-        # Connect cell actions
+        # Connect cell actions (selected carries the cell index)
         for cell in self.gallery_widget.cells:
-            if cell.index is not None:
-                cell.action.connect(
-                    lambda bound_cell=cell: self._handle_image_selection(bound_cell.index) 
-                    if bound_cell.index is not None else None
-                )
+            cell.selected.connect(self._handle_image_selection)
         
         main_layout.addWidget(self.gallery_widget)
         
@@ -230,17 +237,25 @@ class ViewSelectionWindow(QWidget):
             return
         
         selected_cell = self.gallery_widget.cells[index]
-        if hasattr(selected_cell, 'image_path'):
+        if selected_cell.image_path is not None:
             self.selected_image_path = selected_cell.image_path
             log.debug(f"Selected image for {self.view_type}: {self.selected_image_path}")
             
-            # Update visual selection
-            for i, cell in enumerate(self.gallery_widget.cells):
-                if cell and hasattr(cell, 'label'):
-                    if i == index:
-                        cell.label.setStyleSheet("border: 3px solid rgba(0, 160, 200, 0.9); border-radius: 15px;")
-                    else:
-                        cell.label.setStyleSheet("border: 0px;")
+            # Update visual selection: only the previous and the new cell change
+            if self._selected_cell_index is not None and self._selected_cell_index < len(self.gallery_widget.cells):
+                self._set_cell_selected(self.gallery_widget.cells[self._selected_cell_index], False)
+            self._set_cell_selected(selected_cell, True)
+            self._selected_cell_index = index
+
+    @staticmethod
+    def _set_cell_selected(cell: GalleryCell, selected: bool):
+        """Toggles the selection border of a cell's label (see SELECTION_STYLE)."""
+        if cell.label is None:
+            return
+        cell.label.setProperty("selected", selected)
+        # Dynamic properties are not watched by the style; repolish to apply the matching rule
+        cell.label.style().unpolish(cell.label)
+        cell.label.style().polish(cell.label)
     
     def _handle_device_upload(self):
         """Handles the device upload request."""
@@ -263,6 +278,13 @@ class ViewSelectionWindow(QWidget):
 class PrepareFor3dGen(FormWindow):
     """Window to guide the user through selecting a render and preparing it for 3D generation."""
 
+    # Bytes read per base64 step; a multiple of 3, so no padding appears mid-stream
+    B64_ENCODE_CHUNK = 57 * 1024
+
+    # Side of the info dialog image; the scaled pixmap is shared by all windows
+    INFO_IMAGE_SIZE = 150
+    _info_pixmap: Optional[QPixmap] = None
+
     def __init__(
         self, 
         generations: GalleryWidget, 
@@ -452,6 +474,33 @@ class PrepareFor3dGen(FormWindow):
 
     # ==================== Event Handlers ====================
     
+    @classmethod
+    def _get_info_pixmap(cls) -> QPixmap:
+        """Returns the info dialog image; the SVG is located, rendered and scaled only on the first call."""
+        if cls._info_pixmap is None:
+            resource_path = ":/Archi_ProjectContext.svg"
+            if os.path.exists(resource_path):
+                pixmap = QPixmap(resource_path)
+            else:
+                alt_path = os.path.join(
+                    os.path.dirname(__file__), "..", "..", "..", 
+                    "Gui", "Resources", "icons", "Archi_ProjectContext.svg"
+                )
+                if os.path.exists(alt_path):
+                    pixmap = QPixmap(alt_path)
+                else:
+                    pixmap = QPixmap(200, 200)
+                    pixmap.fill(Qt.GlobalColor.transparent)
+
+            if not pixmap.isNull():
+                pixmap = pixmap.scaled(
+                    cls.INFO_IMAGE_SIZE, cls.INFO_IMAGE_SIZE, 
+                    Qt.AspectRatioMode.KeepAspectRatio, 
+                    Qt.TransformationMode.SmoothTransformation
+                )
+            cls._info_pixmap = pixmap
+        return cls._info_pixmap
+
     def _show_info_dialog(self):
         """Shows an information dialog with an image."""
         dialog = QDialog(self)
@@ -473,27 +522,9 @@ class PrepareFor3dGen(FormWindow):
         
         # Image
         image_label = QLabel()
-        resource_path = ":/Archi_ProjectContext.svg"
-        if os.path.exists(resource_path):
-            pixmap = QPixmap(resource_path)
-        else:
-            alt_path = os.path.join(
-                os.path.dirname(__file__), "..", "..", "..", 
-                "Gui", "Resources", "icons", "Archi_ProjectContext.svg"
-            )
-            if os.path.exists(alt_path):
-                pixmap = QPixmap(alt_path)
-            else:
-                pixmap = QPixmap(200, 200)
-                pixmap.fill(Qt.GlobalColor.transparent)
-        
+        pixmap = self._get_info_pixmap()
         if not pixmap.isNull():
-            scaled_pixmap = pixmap.scaled(
-                150, 150, 
-                Qt.AspectRatioMode.KeepAspectRatio, 
-                Qt.TransformationMode.SmoothTransformation
-            )
-            image_label.setPixmap(scaled_pixmap)
+            image_label.setPixmap(pixmap)
         image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(image_label)
         
@@ -562,13 +593,34 @@ class PrepareFor3dGen(FormWindow):
         """Callback when an image is selected in the ViewSelectionWindow."""
         log.debug(f"_on_image_selected_callback: {view_type}, {image_path}")
         
+        self.selected_images[view_type] = image_path
+        self.selected_view_type = view_type
+
         if view_type in self.multi_view_cells:
             cell = self.multi_view_cells[view_type]
-            cell.set_image(image_path)
             cell.set_selected(True)
-        
-        self.selected_images[view_type] = image_path
-        self.selected_view_type = view_type
+            pixmap = MultiViewCell.cached_preview(image_path)
+            if pixmap is not None:
+                cell.set_pixmap(image_path, pixmap)
+            else:
+                # No thumbnail large enough: decode the full image off the GUI thread
+                self.auth_session.masterAPI.run_async_task(
+                    read_image,
+                    functools.partial(self._on_preview_decoded, view_type, image_path),
+                    image_path,
+                    MultiViewCell.PREVIEW_SIZE
+                )
+
+    def _on_preview_decoded(self, view_type: str, image_path: str, response: AsyncResponse):
+        """Shows a preview decoded by read_image, unless another image was picked for the view meanwhile."""
+        if not response.has_result():
+            log.error(f"Failed to load image {image_path}: {response.error}")
+            return
+        pixmap = QPixmap.fromImage(response.result)
+        MultiViewCell.cache_preview(image_path, pixmap)
+        cell = self.multi_view_cells.get(view_type)
+        if cell is not None and self.selected_images.get(view_type) == image_path:
+            cell.set_pixmap(image_path, pixmap)
 
     def _handle_approve_render(self):
         """Checks selection and proceeds directly to 3D generation."""
@@ -592,31 +644,57 @@ class PrepareFor3dGen(FormWindow):
 
         log.debug(f"_handle_approve_model: Selected images: {list(self.selected_images.keys())}")
 
-        # Build multi-image input
-        gen3d_input_dict = {}
+        # Reading and encoding up to five images runs in the background
+        self._show_waiting_message(UIStrings.GENERATION_WAITING, UIStrings.GENERATION_WAITING_TEXT)
+        self.auth_session.masterAPI.run_async_task(
+            self._encode_images,
+            self._on_images_encoded,
+            dict(self.selected_images)
+        )
+
+    @classmethod
+    def _encode_images(cls, paths: dict[str, str]) -> dict[str, str]:
+        """
+        Reads and base64-encodes the selected images (runs in a worker thread).
         
-        for view_type, image_path in self.selected_images.items():
-            try:
-                with open(image_path, 'rb') as f:
-                    image_bytes = f.read()
-                
-                if not image_bytes:
-                    QMessageBox.warning(self, UIStrings.ERROR_TITLE, f"Изображение пустое: {image_path}")
-                    return
-                
-                image_bytes_b64 = base64.b64encode(image_bytes).decode()
-                log.debug(f"_handle_approve_model: Loaded {view_type} image, size: {len(image_bytes)} bytes")
-                
-                gen3d_input_dict[view_type] = image_bytes_b64
-                    
-            except FileNotFoundError:
-                QMessageBox.critical(self, UIStrings.ERROR_TITLE, f"Файл не найден: {image_path}")
-                FreeCAD.Console.PrintError(f"_handle_approve_model: File not found: {image_path}\n")
-                return
-            except Exception as e:
-                QMessageBox.critical(self, UIStrings.ERROR_TITLE, f"Не удалось прочитать изображение: {e}")
-                FreeCAD.Console.PrintError(f"_handle_approve_model: Failed to read image: {e}\n")
-                return
+        Args:
+            paths: View type -> image path
+            
+        Returns:
+            View type -> base64 encoded image
+        """
+        encoded = {}
+        # One read buffer is reused for every file, so the raw image is never held in full
+        chunk = bytearray(cls.B64_ENCODE_CHUNK)
+        view = memoryview(chunk)
+        for view_type, image_path in paths.items():
+            size = os.path.getsize(image_path)
+            if not size:
+                raise ValueError(f"Изображение пустое: {image_path}")
+            buf = bytearray()
+            with open(image_path, 'rb', buffering=1 << 20) as f:
+                while read := f.readinto(chunk):
+                    buf += base64.b64encode(view[:read])
+            encoded[view_type] = buf.decode('ascii')
+            log.debug(f"_encode_images: Loaded {view_type} image, size: {size} bytes")
+        return encoded
+
+    def _on_images_encoded(self, response: AsyncResponse[dict[str, str]]):
+        """Builds the Gen3dInput from the encoded images and calls the API."""
+        if response.error:
+            self._hide_waiting_message()
+            error = response.error
+            if isinstance(error, FileNotFoundError):
+                QMessageBox.critical(self, UIStrings.ERROR_TITLE, f"Файл не найден: {error.filename}")
+                FreeCAD.Console.PrintError(f"_on_images_encoded: File not found: {error.filename}\n")
+            elif isinstance(error, ValueError):
+                QMessageBox.warning(self, UIStrings.ERROR_TITLE, str(error))
+            else:
+                QMessageBox.critical(self, UIStrings.ERROR_TITLE, f"Не удалось прочитать изображение: {error}")
+                FreeCAD.Console.PrintError(f"_on_images_encoded: Failed to read image: {error}\n")
+            return
+
+        gen3d_input_dict = response.result
 
         # Get quality settings
         resolution_quality = self.resolution_combo.currentText() if self.resolution_combo else "low"
@@ -626,8 +704,8 @@ class PrepareFor3dGen(FormWindow):
         gen3d_input_dict["face"] = face_quality
         
         gen3d_input = models.Gen3dInput(**gen3d_input_dict)
-        log.debug(f"_handle_approve_model: Created Gen3dInput with fields: {list(gen3d_input_dict.keys())}")
-        log.debug(f"_handle_approve_model: Quality - resolution: {resolution_quality}, face: {face_quality}")
+        log.debug(f"_on_images_encoded: Created Gen3dInput with fields: {list(gen3d_input_dict.keys())}")
+        log.debug(f"_on_images_encoded: Quality - resolution: {resolution_quality}, face: {face_quality}")
         
         self._call_generate_3d_api(gen3d_input)
 
@@ -291,7 +291,7 @@ class GenerateVideoBehaviour(ProjectBehaviour):
             
             # Update progress
             if self.loading_cell:
-                self.loading_cell.update_progress(
+                self.loading_cell.post_progress(
                     status.progress,
                     estimated_time=status.estimated_time
                 )
@@ -413,9 +413,7 @@ class GenerateVideoBehaviour(ProjectBehaviour):
             project_path = exporting.get_project_path()
             log.info(f"GenerateVideoBehaviour: Project path: {project_path}")
             gen_dir = f"{project_path}/{self.GENERATIONS_DIR}"
-            if not os.path.exists(gen_dir):
-                os.makedirs(gen_dir)
-                log.info(f"GenerateVideoBehaviour: Created directory: {gen_dir}")
+            os.makedirs(gen_dir, exist_ok=True)
             
             # Generate filename
             timestamp = datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
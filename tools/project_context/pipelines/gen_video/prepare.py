@@ -18,7 +18,7 @@ from PySide.QtGui import QPixmap
 
 from tools.project_context.pipelines.form_window import FormWindow
 from tools import exporting, models
-from tools.project_context.utils.gallery_utils import GalleryWidget, GalleryCell, GalleryStyle, ImageCell
+from tools.project_context.utils.gallery_utils import GalleryWidget, GalleryCell, GalleryStyle, ImageCell, cached_pixmap
 import tools.log as log
 
 
@@ -186,13 +186,13 @@ class FrameSelectionWindow(QWidget):
             return
         
         selected_cell = self.gallery_widget.cells[index]
-        if hasattr(selected_cell, 'image_path'):
+        if selected_cell.image_path is not None:
             self.selected_image_path = selected_cell.image_path
             log.debug(f"Selected {self.frame_type} frame: {self.selected_image_path}")
             
             # Update visual selection
             for i, cell in enumerate(self.gallery_widget.cells):
-                if cell and hasattr(cell, 'label'):
+                if cell and cell.label is not None:
                     if i == index:
                         cell.label.setStyleSheet(
                             "border: 3px solid rgba(0, 160, 200, 0.9); border-radius: 15px;"
@@ -277,7 +277,7 @@ class FramePreviewWidget(QWidget):
     def set_image(self, image_path: str):
         """Set the preview image."""
         self.image_path = image_path
-        pixmap = QPixmap(image_path)
+        pixmap = cached_pixmap(image_path)
         if not pixmap.isNull():
             scaled = pixmap.scaled(
                 170, 170,
@@ -1,4 +1,6 @@
 from typing import List, Optional, Callable, Dict, Any
+import functools
+import importlib
 import os
 import shutil
 import datetime
@@ -14,9 +16,9 @@ from PySide.QtCore import Qt
 from tools.view_3d import View3DStyle
 from tools.authentication.authentication import AuthenticatedSession
 from tools.master_api import MasterAPI
-from tools.models import Gen3dId, Gen3dSaved
+from tools.models import Gen3dId, Gen3dSaved, GEN3D_FORMAT_PRIORITY
 from tools.project_context.utils.gallery_utils import (ImageCell, View3DCell, VideoCell,
-                                GalleryStyle, GalleryWidget, select_images)
+                                GalleryStyle, GalleryWidget, select_images, thumbnail_path)
 from tools.full_view import (FullViewWindow, FullViewImageInteractable, FullView3DInteractable,
                             FullViewVideoInteractable, FullViewButtonData, FullViewWindowData)
 import tools.exporting as exporting
@@ -26,9 +28,16 @@ from tools.project_context.pipelines.gen_2d import PrepareFor2dGen, Generate2dBe
 from tools.project_context.pipelines.gen_3d import PrepareFor3dGen, Generate3dBehaviour
 from tools.project_context.pipelines.gen_video import GenerateVideoBehaviour
 
-# Backward compatibility alias
-DownloadModelBehaviour = Generate3dBehaviour
-
+# Model file extension -> FreeCAD module whose insert() imports it
+MODEL_IMPORTERS = {
+    ".obj": "Mesh",
+    ".stl": "Mesh",
+    ".step": "Part",
+    ".stp": "Part",
+    ".iges": "Part",
+    ".igs": "Part",
+    ".brep": "Part",
+}
 
 # UI Constants
 class UIStrings:
@@ -285,10 +294,10 @@ class ProjectContextWindow(QDockWidget):
         )
         
         # Set callback to connect video cell actions
+        show_video_cell = functools.partial(self._show_cell, self.gen_video_interactable)
+
         def connect_video_cell_action(video_cell):
-            video_cell.action.connect(
-                lambda: self.full_view.show(self.gen_video_interactable(video_cell))
-            )
+            video_cell.action.connect(show_video_cell)
         behaviour.on_video_cell_created = connect_video_cell_action
         
         self.behaviours.append(behaviour)
@@ -301,8 +310,13 @@ class ProjectContextWindow(QDockWidget):
             self.sketches.change_cell(index, cell)
             self.full_view.show(self.sketch_interactable(cell))
     
-    def gallery_on_delete_cell(self, gallery, item_name, cell):
-        """Handle deletion of a cell from a gallery."""
+    def gallery_on_delete_cell(self, gallery, item_name, cell, *_):
+        """Handle deletion of a cell from a gallery (extra signal arguments are ignored)."""
+        # Drop the full view slot so nothing keeps the removed cell connected
+        try:
+            cell.action.disconnect()
+        except (RuntimeError, TypeError):
+            pass
         gallery.remove(cell.index)
         # Handle different cell types
         if isinstance(cell, ImageCell):
@@ -321,7 +335,7 @@ class ProjectContextWindow(QDockWidget):
                 buttons=[
                     FullViewButtonData(
                         name=UIStrings.DELETE, 
-                        action=lambda: self.gallery_on_delete_cell(self.sketches, "sketches", cell)
+                        action=functools.partial(self.gallery_on_delete_cell, self.sketches, "sketches", cell)
                     ),
                     FullViewButtonData(
                         name=UIStrings.REPLACE, 
@@ -329,7 +343,7 @@ class ProjectContextWindow(QDockWidget):
                     ),
                     FullViewButtonData(
                         name=UIStrings.CLOSE, 
-                        action=lambda: self.full_view.close()
+                        action=self.full_view.close
                     )
                 ]
             )
@@ -343,11 +357,11 @@ class ProjectContextWindow(QDockWidget):
                 buttons=[
                     FullViewButtonData(
                         name=UIStrings.DELETE, 
-                        action=lambda: self.gallery_on_delete_cell(self.gen2d, "generations2d", cell)
+                        action=functools.partial(self.gallery_on_delete_cell, self.gen2d, "generations2d", cell)
                     ),
                     FullViewButtonData(
                         name=UIStrings.CLOSE, 
-                        action=lambda: self.full_view.close()
+                        action=self.full_view.close
                     )
                 ]
             )
@@ -367,11 +381,11 @@ class ProjectContextWindow(QDockWidget):
                     ),
                     FullViewButtonData(
                         name=UIStrings.DELETE, 
-                        action=lambda: self.gallery_on_delete_cell(self.gen3d, "generations3d", cell)
+                        action=functools.partial(self.gallery_on_delete_cell, self.gen3d, "generations3d", cell)
                     ),
                     FullViewButtonData(
                         name=UIStrings.CLOSE, 
-                        action=lambda: self.full_view.close()
+                        action=self.full_view.close
                     )
                 ]
             )
@@ -379,18 +393,15 @@ class ProjectContextWindow(QDockWidget):
     
     def _import_3d_model(self, cell: View3DCell):
         """Import 3D model into FreeCAD document."""
-        # Get model path from Gen3dResult.object.obj_url
+        # First model file in the same format order as the downloader
         model_path = None
         gen3d_result = cell.view3dData.local if cell.view3dData.local else cell.view3dData.online
         
         if gen3d_result and gen3d_result.object:
-            # Prefer OBJ, then FBX, then GLB
-            if gen3d_result.object.obj_url:
-                model_path = gen3d_result.object.obj_url
-            elif gen3d_result.object.fbx_url:
-                model_path = gen3d_result.object.fbx_url
-            elif gen3d_result.object.glb_url:
-                model_path = gen3d_result.object.glb_url
+            model_path = next(
+                (url for url in (getattr(gen3d_result.object, attr) for attr, _ in GEN3D_FORMAT_PRIORITY) if url),
+                None
+            )
         
         if not model_path:
             QMessageBox.warning(
@@ -418,24 +429,10 @@ class ProjectContextWindow(QDockWidget):
             # Get file extension
             ext = os.path.splitext(model_path)[1].lower()
             
-            # Import based on file type
-            if ext == '.obj':
-                import Mesh
-                Mesh.insert(model_path, doc.Name)
-                log.info(f"_import_3d_model: Imported OBJ mesh: {model_path}")
-            elif ext in ('.step', '.stp', '.iges', '.igs', '.brep'):
-                import Part
-                Part.insert(model_path, doc.Name)
-                log.info(f"_import_3d_model: Imported Part: {model_path}")
-            elif ext == '.stl':
-                import Mesh
-                Mesh.insert(model_path, doc.Name)
-                log.info(f"_import_3d_model: Imported STL mesh: {model_path}")
-            else:
-                # Generic import
-                import ImportGui
-                ImportGui.insert(model_path, doc.Name)
-                log.info(f"_import_3d_model: Imported with ImportGui: {model_path}")
+            # Import based on file type (generic ImportGui for anything else)
+            importer_name = MODEL_IMPORTERS.get(ext, "ImportGui")
+            importlib.import_module(importer_name).insert(model_path, doc.Name)
+            log.info("_import_3d_model: Imported with %s: %s", importer_name, model_path)
             
             # Fit view to show the imported model
             FreeCADGui.SendMsgToActiveView("ViewFit")
@@ -502,11 +499,11 @@ class ProjectContextWindow(QDockWidget):
                     ),
                     FullViewButtonData(
                         name=UIStrings.DELETE,
-                        action=lambda: self.gallery_on_delete_cell(self.gen_video, "generations_video", cell)
+                        action=functools.partial(self.gallery_on_delete_cell, self.gen_video, "generations_video", cell)
                     ),
                     FullViewButtonData(
                         name=UIStrings.CLOSE,
-                        action=lambda: self.full_view.close()
+                        action=self.full_view.close
                     )
                 ]
             )
@@ -527,7 +524,7 @@ class ProjectContextWindow(QDockWidget):
         # Load 2D generations
         self._load_gallery_cells(
             self.gen2d, 
-            [ImageCell(image_path=path) for path in model.generations2d],
+            [ImageCell(image_path=path, thumb_path=thumbnail_path(path)) for path in model.generations2d],
             self.gen2d_interactable
         )
     
@@ -551,10 +548,14 @@ class ProjectContextWindow(QDockWidget):
     def _load_gallery_cells(self, gallery, cells, interactable_func):
         """Helper method to load cells into a gallery with proper event connections."""
         gallery.add_cells(cells)
+        # action carries the cell, so one slot serves the whole gallery
+        show_cell = functools.partial(self._show_cell, interactable_func)
         for cell in gallery.cells:
-            cell.action.connect(
-                lambda cell=cell: self.full_view.show(interactable_func(cell))
-            )
+            cell.action.connect(show_cell)
+
+    def _show_cell(self, interactable_func, cell):
+        """Open a gallery cell in the full view (the window data is rebuilt because show() deletes the previous interactable)."""
+        self.full_view.show(interactable_func(cell))
 
     def _save_video_frame_to_gen2d(self, frame_path: str) -> Optional[str]:
         """Copy extracted frame into generations2d and update gallery."""
@@ -565,11 +566,15 @@ class ProjectContextWindow(QDockWidget):
         os.makedirs(gen_dir, exist_ok=True)
         timestamp = datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S-%f')
         dest_path = os.path.join(gen_dir, f"video_frame_{timestamp}.jpg")
-        shutil.copy(frame_path, dest_path)
+        # Read the frame once: the same bytes are written to the project and decoded for the cell
+        with open(frame_path, "rb") as f:
+            data = f.read()
+        with open(dest_path, "wb") as f:
+            f.write(data)
 
-        frame_cell = ImageCell(image_path=dest_path)
+        frame_cell = ImageCell.from_bytes(data, dest_path)
         self.gen2d.add_cell(frame_cell)
-        frame_cell.action.connect(lambda cell=frame_cell: self.full_view.show(self.gen2d_interactable(cell)))
+        frame_cell.action.connect(functools.partial(self._show_cell, self.gen2d_interactable))
         exporting.save_arr_item("generations2d", dest_path)
         return dest_path
 
@@ -626,7 +631,7 @@ class ProjectContextWindow(QDockWidget):
         # Add download behavior to track model downloading
         status_callback = lambda x: print("Status of loading model - ", x)
         self.behaviours.append(
-            DownloadModelBehaviour(
+            Generate3dBehaviour(
                 status_callback,
                 self.gen3d,
                 result,
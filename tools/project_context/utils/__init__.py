@@ -1,6 +1,6 @@
 from .project_behaviour_base import ProjectBehaviour
-from .image_utils import apply_blur_effect, blend_images, image_to_array, array_to_qimage
-from .widgets import MyRadioButton
+from .image_utils import apply_blur_effect, blend_images, image_to_array, array_to_qimage, cached_pixmap
+from .widgets import MyRadioButton, main_window
 from .multiview_widgets import MultiViewCell
 
 __all__ = [
@@ -9,7 +9,9 @@ __all__ = [
     "blend_images",
     "image_to_array",
     "array_to_qimage",
+    "cached_pixmap",
     "MyRadioButton",
+    "main_window",
     "MultiViewCell",
 ]
 
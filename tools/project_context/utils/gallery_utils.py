@@ -7,9 +7,10 @@ from pathlib import Path
 import FreeCADGui
 import FreeCAD
 from PySide.QtCore import (Qt, QObject, Signal, QEvent, QPropertyAnimation, QEasingCurve, QPoint, Property,
-                           QSequentialAnimationGroup, QPauseAnimation, QRectF, QTimer)
+                           QSequentialAnimationGroup, QPauseAnimation, QRectF, QTimer, QByteArray, QBuffer,
+                           QIODevice)
 from PySide.QtGui import (QPixmap, QPainter, QPainterPath, QWheelEvent, QPen, QColor, QLinearGradient, QFont,
-                          QRadialGradient, QRegion)
+                          QRadialGradient, QRegion, QImage, QImageReader)
 from PySide.QtWidgets import (QWidget, QLabel, QVBoxLayout, QScrollArea, QFileDialog, QPushButton, QHBoxLayout,
                                QDockWidget, QStackedLayout, QSizePolicy)
 from PySide.QtSvgWidgets import QSvgWidget
@@ -31,25 +32,81 @@ except ImportError:
         HAS_QT6_MEDIA = False
 from tools.view_3d import View3DWindow
 import tools.exporting as exporting
-from typing import List, Dict, Optional
+from tools.exporting import THUMBNAILS_DIR, thumbnail_path
+from typing import Iterable, List, Dict, Optional
 from pydantic import BaseModel, ConfigDict
 from tools.models import Gen3dSaved
 from tools.master_api import MasterAPI
 from tools.view_3d import View3DStyle
 import time
 import tools.log as log
+from tools.project_context.utils.image_utils import cached_pixmap, cache_pixmap
+
+# Gallery thumbnails are stored next to the image (see exporting.thumbnail_path)
+THUMBNAIL_SIZE = 256
+THUMBNAIL_QUALITY = 80
+
+
+def read_image(image_path: str, size: int, data: Optional[QByteArray] = None) -> Optional[QImage]:
+    """
+    Decodes image_path downscaled to fit size x size (smaller images are kept as is).
+    If the encoded file contents are already in memory, pass them as data to skip reading the file.
+    Uses QImage only, so it is safe to call from a worker thread; convert with QPixmap.fromImage on the GUI thread.
+    Returns None if the image could not be read.
+    """
+    if data is not None:
+        buffer = QBuffer(data)
+        buffer.open(QIODevice.ReadOnly)
+        reader = QImageReader(buffer)
+    else:
+        reader = QImageReader(image_path)
+    source_size = reader.size()
+    if source_size.isValid() and max(source_size.width(), source_size.height()) > size:
+        # Let the decoder scale while reading (JPEG decodes directly at reduced size)
+        reader.setScaledSize(source_size.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull():
+        log.warning(f"read_image: failed to read {image_path}: {reader.errorString()}")
+        return None
+    return image
+
+
+def write_thumbnail(image_path: str, size: int = THUMBNAIL_SIZE, data: Optional[QByteArray] = None) -> Optional[QImage]:
+    """
+    Writes a downscaled JPEG copy of image_path (to thumbnail_path) for the gallery grid.
+    If the encoded file contents are already in memory, pass them as data to skip reading the file.
+    Uses QImage only, so it is safe to call from a worker thread.
+    Returns the thumbnail image, or None if the image could not be read.
+    """
+    image = read_image(image_path, size, data)
+    if image is None:
+        return None
+    path = thumbnail_path(image_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if not image.save(path, "JPG", THUMBNAIL_QUALITY):
+        log.warning(f"write_thumbnail: failed to save {path}")
+    return image
+
+
 class GalleryCell(QWidget):
 
     action = Signal(QWidget)
+    # Same click as action, carrying only the cell index (lets one bound slot serve every cell)
+    selected = Signal(int)
 
     def __init__(self, parent:QObject=None):
         super().__init__(parent)
         self.index = None
+        # Set by subclasses that show an image; always present so callers can test for None
+        self.label: Optional[QLabel] = None
+        self.image_path: Optional[str] = None
+        self.pixmap: Optional[QPixmap] = None
 
     def trigger(self):
         if self.index is None:
             raise Exception("Index is not set")
         self.action.emit(self)
+        self.selected.emit(self.index)
 
     def mousePressEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
@@ -69,7 +126,7 @@ class GalleryCell(QWidget):
     
     def copy(self):
         if isinstance(self, ImageCell):
-            return ImageCell(self.image_path)
+            return ImageCell(self.image_path, thumb_path=self.thumb_path)
         elif isinstance(self, AnimatedCell):
             return AnimatedCell(self.svg_path)
         elif isinstance(self, View3DCell):
@@ -80,17 +137,48 @@ class GalleryCell(QWidget):
             return GalleryCell()
 
 class ImageCell(GalleryCell):
-    def __init__(self, image_path:str, parent=None):
+    def __init__(self, image_path:str, parent=None, thumb_path:Optional[str]=None, pixmap:Optional[QPixmap]=None):
         super().__init__( parent=parent)
         self.image_path = image_path
-        self.pixmap = QPixmap(image_path)
+        # The grid only needs a small copy; the full image is loaded by the full view
+        self.thumb_path = thumb_path if thumb_path and os.path.exists(thumb_path) else None
+        if pixmap is not None:
+            # Already decoded elsewhere: share it with later cells for the same thumbnail.
+            # Without a thumbnail file the pixmap may still be a downscaled copy, so it is not
+            # cached under the full image path
+            if self.thumb_path is not None:
+                cache_pixmap(self.thumb_path, pixmap)
+            self.pixmap = pixmap
+        else:
+            self.pixmap = cached_pixmap(self.thumb_path or image_path)
         if self.pixmap.isNull():
             raise Exception(f"Image {image_path} is not valid")
+        # make_round replaces self.pixmap with a scaled copy; keep the decoded one for copy()
+        self._source_pixmap = self.pixmap
+        # Rounded copies by cell width, so repeated resizes to the same width do not rescale
+        self._rounded: Dict[int, QPixmap] = {}
         self.label = QLabel(self)
         self.label.setPixmap(self.pixmap)
         self.label.setParent(self)
         self.label.show()
 
+    @classmethod
+    def from_pixmap(cls, pixmap:QPixmap, image_path:str, thumb_path:Optional[str]=None, parent=None):
+        """Creates a cell from an already decoded pixmap, skipping the read from disk."""
+        return cls(image_path, parent=parent, thumb_path=thumb_path, pixmap=pixmap)
+
+    @classmethod
+    def from_bytes(cls, data:bytes, image_path:str, parent=None):
+        """Creates a cell from encoded image bytes already in memory (e.g. just written to image_path)."""
+        pixmap = QPixmap()
+        if not pixmap.loadFromData(data):
+            raise Exception(f"Image {image_path} is not valid")
+        return cls(image_path, parent=parent, pixmap=pixmap)
+
+    def copy(self):
+        """Shallow copy: shares the decoded pixmap (implicitly shared by Qt), only the label is new."""
+        return ImageCell(self.image_path, thumb_path=self.thumb_path, pixmap=self._source_pixmap)
+
     def resize(self, width):
         self.make_round(width)
         self.label.setPixmap(self.pixmap)
@@ -99,10 +187,18 @@ class ImageCell(GalleryCell):
            
     def make_round(self, width):
         target_width = width
-        
-        scale_factor = target_width / self.pixmap.width()
-        target_height = int(self.pixmap.height() * scale_factor)
-        pixmap = self.pixmap.scaled(target_width, target_height, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+        rounded = self._rounded.get(target_width)
+        if rounded is not None:
+            self.label.setFixedSize(rounded.size())
+            self.setFixedSize(rounded.size())
+            self.pixmap = rounded
+            return
+
+        # Always scale from the decoded image, not from a previous rounded copy
+        source = self._source_pixmap
+        scale_factor = target_width / source.width()
+        target_height = int(source.height() * scale_factor)
+        pixmap = source.scaled(target_width, target_height, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
 
         rounded = QPixmap(pixmap.size())
         rounded.fill(Qt.GlobalColor.transparent)
@@ -116,6 +212,7 @@ class ImageCell(GalleryCell):
         painter.end()
         self.label.setFixedSize(target_width, target_height)
         self.setFixedSize(target_width, target_height)
+        self._rounded[target_width] = rounded
         self.pixmap = rounded
         
 class AnimatedCell(GalleryCell):
@@ -141,7 +238,7 @@ class AnimatedCell(GalleryCell):
         self.timer.start(800)
 
     def setBackground(self, url, effect = None):
-        self.background.setPixmap(QPixmap(url))
+        self.background.setPixmap(cached_pixmap(url))
         if(effect):
             self.background.setGraphicsEffect(effect)
         self.background.show()
@@ -173,11 +270,18 @@ class AnimatedCell(GalleryCell):
             """)
 
 class LoadingCell(GalleryCell):
+    # Queued to the GUI thread by post_progress
+    _progress_posted = Signal()
+
     def __init__(self, parent=None):
         super().__init__(parent=parent)
         self._target_progress = 0
         self._current_progress = 0
         self._is_closing = False
+        # Latest (progress, estimated_time) from post_progress, applied by _flush_progress
+        self._pending_progress = None
+        self._progress_flush_scheduled = False
+        self._progress_posted.connect(self._flush_progress, Qt.ConnectionType.QueuedConnection)
         self.setMinimumSize(200, 200)
         self.setMaximumSize(200, 200)
         self.setStyleSheet("""
@@ -298,6 +402,22 @@ class LoadingCell(GalleryCell):
         if estimated_time is not None:
             self.set_estimated_time(estimated_time)
 
+    def post_progress(self, progress, estimated_time=None):
+        """
+        Thread-safe update_progress for pollers running in worker threads.
+        Posts made before the GUI thread gets to them are coalesced: only the latest is applied.
+        """
+        self._pending_progress = (progress, estimated_time)
+        if not self._progress_flush_scheduled:
+            self._progress_flush_scheduled = True
+            self._progress_posted.emit()
+
+    def _flush_progress(self):
+        self._progress_flush_scheduled = False
+        pending, self._pending_progress = self._pending_progress, None
+        if pending is not None:
+            self.update_progress(*pending)
+
     def _update_progress(self):
         """Update progress based on elapsed time."""
         if self.estimated_time is None:
@@ -823,7 +943,7 @@ class VideoCell(GalleryCell):
         painter.drawPixmap(0, 0, square)
         painter.end()
 
-        if hasattr(self, "label"):
+        if self.label is not None:
             self.label.setPixmap(rounded)
             self.label.setFixedSize(width, width)
         self.setFixedSize(width, width)
@@ -918,6 +1038,8 @@ class GalleryWidget(QWidget):
         super(GalleryWidget, self).__init__()
         self.galleryStyle = gallery_style
         self.cells:List[GalleryCell] = []
+        # Tallest height/width ratio of the cells' pixmaps; reset whenever cells change
+        self._cached_max_aspect: Optional[float] = None
         # --- Subheader: Sketches ---
         content = QWidget()
         scroll_area = QScrollArea()
@@ -959,7 +1081,30 @@ class GalleryWidget(QWidget):
         self.main_layout = QVBoxLayout(self)
         self.main_layout.addWidget(scroll_area)
     
+    def __len__(self):
+        return len(self.cells)
+
+    def __bool__(self):
+        # QWidget instances are always truthy; keep that even when the gallery is empty
+        return True
+
+    def max_aspect_ratio(self) -> float:
+        """Tallest height/width ratio among the cells' pixmaps (at least 1.0, i.e. square)."""
+        if self._cached_max_aspect is None:
+            max_aspect = 1.0
+            for cell in self.cells:
+                pixmap = cell.pixmap
+                if pixmap is None:
+                    # Cells without a pixmap do not affect the ratio
+                    continue
+                w = pixmap.width()
+                if w > 0:
+                    max_aspect = max(max_aspect, pixmap.height() / w)
+            self._cached_max_aspect = max_aspect
+        return self._cached_max_aspect
+
     def add_cell(self, cell:GalleryCell) -> int:
+        self._cached_max_aspect = None
         cell.resize(self.galleryStyle.width_of_cell)
         y = self.heights.index(min(self.heights))
         self.heights[y] += cell.getHeight() + self.galleryStyle.gap
@@ -971,7 +1116,8 @@ class GalleryWidget(QWidget):
         self.replace_nice()
         return len(self.cells) - 1
         
-    def add_cells(self, cells:List[GalleryCell]):
+    def add_cells(self, cells:Iterable[GalleryCell]):
+        self._cached_max_aspect = None
         for cell in cells:
             cell.resize(self.galleryStyle.width_of_cell)
             y = self.heights.index(min(self.heights))
@@ -985,6 +1131,7 @@ class GalleryWidget(QWidget):
         self.replace_nice()
     
     def remove(self, index:int):
+        self._cached_max_aspect = None
         if index >= len(self.cells):
             index = len(self.cells) - 1
         self.cells[index].close()
@@ -999,6 +1146,7 @@ class GalleryWidget(QWidget):
             self.heights[y] += self.cells[i].getHeight() + self.galleryStyle.gap
             
     def change_cell(self, index:int, new_cell:GalleryCell):
+        self._cached_max_aspect = None
         new_cell.resize(self.galleryStyle.width_of_cell)
         new_cell.index = index
         self.cells[index].close()
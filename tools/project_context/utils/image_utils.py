@@ -1,8 +1,50 @@
                     
+import os
+from typing import Optional
+
 import numpy as np
-from PySide.QtGui import QImage, QPixmap, QPainter, QGraphicsScene, QGraphicsPixmapItem, QGraphicsBlurEffect
+from PySide.QtGui import QImage, QPixmap, QPainter, QGraphicsScene, QGraphicsPixmapItem, QGraphicsBlurEffect, QPixmapCache
 from PySide.QtCore import Qt
 
+# Decoded images are shared through QPixmapCache (limit in KiB)
+PIXMAP_CACHE_LIMIT_KB = 128 * 1024
+QPixmapCache.setCacheLimit(max(QPixmapCache.cacheLimit(), PIXMAP_CACHE_LIMIT_KB))
+
+def pixmap_cache_key(path: str, variant: str = "") -> Optional[str]:
+    """
+    QPixmapCache key for path: includes mtime and size, so a file replaced under the same name
+    (e.g. a re-imported sketch) is decoded again. variant tells apart scaled copies of one file.
+    Returns None if the file does not exist.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return f"{path}|{stat.st_mtime_ns}|{stat.st_size}|{variant}"
+
+def cache_pixmap(path: str, pixmap: QPixmap, variant: str = "") -> None:
+    """Stores an already decoded pixmap of path (see pixmap_cache_key)."""
+    key = pixmap_cache_key(path, variant)
+    if key is not None and not pixmap.isNull():
+        QPixmapCache.insert(key, pixmap)
+
+def find_cached_pixmap(path: str, variant: str = "") -> Optional[QPixmap]:
+    """Returns the cached pixmap of path, or None if it is not cached or the file has changed."""
+    key = pixmap_cache_key(path, variant)
+    pixmap = QPixmap()
+    if key is not None and QPixmapCache.find(key, pixmap):
+        return pixmap
+    return None
+
+def cached_pixmap(path: str) -> QPixmap:
+    """Loads an image through QPixmapCache so an unchanged file is decoded once per session."""
+    pixmap = find_cached_pixmap(path)
+    if pixmap is not None:
+        return pixmap
+    pixmap = QPixmap(path)
+    cache_pixmap(path, pixmap)
+    return pixmap
+
 def blend_images(blurred_image: QImage, given_image: QImage) -> QImage:
     """Replace transparent pixels (alpha=0) of given_image with darkened blurred_image (50% RGB, full alpha)."""
 
@@ -1,24 +1,33 @@
 from PySide.QtCore import Qt, Signal
 from PySide.QtWidgets import QWidget
 from PySide.QtGui import QPainter, QColor, QPixmap, QBrush, QFont
+import os
 import tools.log as log
+from tools.project_context.utils.image_utils import cached_pixmap, cache_pixmap, find_cached_pixmap
+from tools.exporting import thumbnail_path
 
 
 class MultiViewCell(QWidget):
     """A minimalistic square cell for displaying selected images in Multi-View generation."""
     
     clicked = Signal(str)  # Emits the view type when clicked
+
+    # Largest side the cell can show (matches setMaximumSize)
+    PREVIEW_SIZE = 300
     
     def __init__(self, view_type: str, parent=None):
         super().__init__(parent)
         self.view_type = view_type
         self.image_path: str | None = None
         self.pixmap: QPixmap | None = None
+        # pixmap scaled for the last painted side length; rebuilt only when the size changes
+        self._scaled_pixmap: QPixmap | None = None
+        self._scaled_side = 0
         self._is_selected = False
         
         # Set minimum size to ensure it's square
         self.setMinimumSize(150, 150)
-        self.setMaximumSize(300, 300)
+        self.setMaximumSize(self.PREVIEW_SIZE, self.PREVIEW_SIZE)
     
     def _get_view_description(self):
         """Returns Russian description for each view type."""
@@ -60,12 +69,15 @@ class MultiViewCell(QWidget):
         
         # Draw image if available
         if self.pixmap:
-            # Scale pixmap to fit in the square
-            scaled_pixmap = self.pixmap.scaled(
-                size - 4, size - 4,
-                Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.TransformationMode.SmoothTransformation
-            )
+            # Scale pixmap to fit in the square (cached between repaints)
+            if self._scaled_pixmap is None or self._scaled_side != size:
+                self._scaled_pixmap = self.pixmap.scaled(
+                    size - 4, size - 4,
+                    Qt.AspectRatioMode.KeepAspectRatio,
+                    Qt.TransformationMode.SmoothTransformation
+                )
+                self._scaled_side = size
+            scaled_pixmap = self._scaled_pixmap
             
             # Center the pixmap
             pixmap_x = x_offset + (size - scaled_pixmap.width()) // 2
@@ -96,15 +108,44 @@ class MultiViewCell(QWidget):
             self.clicked.emit(self.view_type)
         super().mousePressEvent(event)
     
+    @classmethod
+    def cached_preview(cls, image_path: str) -> QPixmap | None:
+        """
+        Returns an already decoded pixmap of image_path that is sharp at PREVIEW_SIZE:
+        the gallery thumbnail if it is at least that large, otherwise a preview stored with
+        cache_preview. None if neither is available.
+        """
+        thumb = thumbnail_path(image_path)
+        if os.path.exists(thumb):
+            pixmap = cached_pixmap(thumb)
+            if max(pixmap.width(), pixmap.height()) >= cls.PREVIEW_SIZE:
+                return pixmap
+        return find_cached_pixmap(image_path, f"@{cls.PREVIEW_SIZE}")
+
+    @classmethod
+    def cache_preview(cls, image_path: str, pixmap: QPixmap):
+        """Stores a preview of image_path decoded at PREVIEW_SIZE for cached_preview."""
+        cache_pixmap(image_path, pixmap, f"@{cls.PREVIEW_SIZE}")
+
     def set_image(self, image_path: str):
         """Set the image to display in the cell."""
         self.image_path = image_path
+        self._scaled_pixmap = None
         try:
-            self.pixmap = QPixmap(image_path)
+            # Smaller thumbnails would be upscaled and blurry; the full image is the fallback
+            pixmap = self.cached_preview(image_path)
+            self.pixmap = pixmap if pixmap is not None else cached_pixmap(image_path)
             self.update()  # Trigger repaint
         except Exception as e:
             log.error(f"Failed to load image {image_path}: {e}")
             self.pixmap = None
+
+    def set_pixmap(self, image_path: str, pixmap: QPixmap):
+        """Set an image that was already decoded (e.g. on a worker thread)."""
+        self.image_path = image_path
+        self.pixmap = pixmap
+        self._scaled_pixmap = None
+        self.update()  # Trigger repaint
     
     def set_selected(self, selected: bool):
         """Update the visual state when selected."""
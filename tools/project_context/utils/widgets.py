@@ -1,6 +1,27 @@
-from PySide.QtWidgets import QRadioButton
+import FreeCADGui
+from PySide.QtWidgets import QRadioButton, QApplication
 from PySide.QtWidgets import QGraphicsBlurEffect
 
+# FreeCAD main window does not change during a session, so it is looked up once
+_main_window_cache = None
+
+
+def _clear_main_window_cache():
+    global _main_window_cache
+    _main_window_cache = None
+
+
+def main_window():
+    """Returns the FreeCAD main window (cached; the cache is cleared when the application quits)."""
+    global _main_window_cache
+    if _main_window_cache is None:
+        _main_window_cache = FreeCADGui.getMainWindow()
+        app = QApplication.instance()
+        if _main_window_cache is not None and app is not None:
+            app.aboutToQuit.connect(_clear_main_window_cache)
+    return _main_window_cache
+
+
 class MyRadioButton(QRadioButton):
     def __init__(self, parent=None):
         super(MyRadioButton, self).__init__(parent)